@@ -0,0 +1,48 @@
+# Benchmark: percentile based auto window with np.percentile over all pixels versus the precomputed
+# cumulative histograms of imaging/presets.py
+#
+#  usage: python -m benchmarks.bench_auto_window [slices] [size]
+#
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_levelwindow import synthetic_ct
+from imaging.presets import SeriesHistograms
+
+
+def main(n_slices=100, size=512):
+    volume = np.stack([synthetic_ct(size, seed=i) - 1024 for i in range(n_slices)]).astype(np.int16)
+
+    start = time.perf_counter()
+    histograms = SeriesHistograms(n_slices)
+    for index in range(n_slices):
+        histograms.add_slice(index, volume[index])
+    t_count = time.perf_counter() - start
+
+    start = time.perf_counter()
+    low, high = np.percentile(volume, [1, 99])
+    t_direct_volume = time.perf_counter() - start
+    start = time.perf_counter()
+    np.percentile(volume[n_slices // 2], [1, 99])
+    t_direct_slice = time.perf_counter() - start
+
+    start = time.perf_counter()
+    level, window = histograms.total.auto_window(1, 99)
+    t_hist_volume = time.perf_counter() - start
+    start = time.perf_counter()
+    for index in range(n_slices):
+        histograms.slice(index).auto_window(1, 99)
+    t_hist_slice = (time.perf_counter() - start) / n_slices
+
+    assert abs((level - window / 2) - low) <= 1 and abs((level + window / 2) - high) <= 1
+    print(f"{n_slices} slices of {size}x{size}, histograms counted once in {t_count * 1000:.1f} ms")
+    print(f"  whole series: np.percentile {t_direct_volume * 1000:8.2f} ms, histogram {t_hist_volume * 1000:6.3f} ms")
+    print(f"  one slice:    np.percentile {t_direct_slice * 1000:8.2f} ms, histogram {t_hist_slice * 1000:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 512)
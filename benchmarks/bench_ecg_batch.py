@@ -0,0 +1,43 @@
+# Scaling benchmark of the parallel batch processing (ecg.batch) on a synthetic 48-record database
+#
+#  usage: python -m benchmarks.bench_ecg_batch [task] [records] [minutes]
+#
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_database
+from ecg.batch import run_batch
+from ecg.store import EcgStore
+
+
+def main(task='qrs', count=48, minutes=30):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"generating {count} synthetic records of {minutes} min ...")
+        synthetic_database(os.path.join(tmp_dir, "db"), count, minutes)
+        store = EcgStore(os.path.join(tmp_dir, "db"))
+        headers = [store.header(name) for name in store.record_names()]
+
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            samples = 0
+            for result in run_batch(headers, task, workers, out_dir=os.path.join(tmp_dir, "out")):
+                if result.error is not None:
+                    raise result.error
+                samples += result.n_samples
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{task}: {workers:2d} workers {elapsed:7.2f} s, {samples / elapsed / 1e6:7.2f} M samples/s, "
+                  f"speedup {baseline / elapsed:5.2f} (ideal {workers})")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args[0] if len(args) > 0 else 'qrs',
+         int(args[1]) if len(args) > 1 else 48,
+         float(args[2]) if len(args) > 2 else 30)
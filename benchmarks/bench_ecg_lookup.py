@@ -0,0 +1,71 @@
+# Micro-benchmark: per-sample EcgSim.get_MLii lookups versus the batched EcgSim.get_samples
+#
+#  Uses data/100.dat if present, otherwise a synthetic 30 minute format 212 record.
+#
+#  usage: python -m benchmarks.bench_ecg_lookup [n_timestamps]
+#
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_record
+from ecg_by_data import EcgSim
+
+
+def legacy_get_MLii(sample_mlii, millisecond):
+    # the original per-sample lookup with while-loop wrapping and bare except
+    while millisecond > 30 * 60000 * 360:
+        millisecond -= (30 * 60000 * 360)
+    try:
+        val = sample_mlii[int(millisecond * 360 / 1000)]
+    except:
+        val = 0
+    return val
+
+
+def main(n_timestamps=100000):
+    filename = "data/100.dat"
+    tmp_dir = None
+    if not os.path.exists(filename):
+        tmp_dir = tempfile.TemporaryDirectory()
+        filename = os.path.join(tmp_dir.name, "synthetic.dat")
+        synthetic_record(filename)
+
+    sim = EcgSim(filename)
+    sim.load_data_212()
+    t_ms = np.random.default_rng(0).uniform(0, sim.duration_ms(), n_timestamps)
+
+    legacy_samples = sim.sample_mlii.tolist()
+    start = time.perf_counter()
+    reference = [legacy_get_MLii(legacy_samples, t) for t in t_ms]
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [sim.get_MLii(t) for t in t_ms]
+    t_single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = sim.get_samples('MLII', t_ms)
+    t_batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sim.get_samples('MLII', t_ms, interpolate=True)
+    t_interp = time.perf_counter() - start
+
+    assert np.array_equal(batch, reference) and np.array_equal(single, reference)
+    print(f"{n_timestamps} timestamps")
+    print(f"  legacy per-sample loop:    {t_legacy * 1000:9.2f} ms")
+    print(f"  get_MLii per sample:       {t_single * 1000:9.2f} ms")
+    print(f"  get_samples (gather):      {t_batch * 1000:9.2f} ms  ({t_legacy / t_batch:.0f}x)")
+    print(f"  get_samples (interpolate): {t_interp * 1000:9.2f} ms")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
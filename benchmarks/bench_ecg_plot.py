@@ -0,0 +1,67 @@
+# Headless render benchmark (Agg backend): time-to-first-frame of plain matplotlib plots versus the
+# min/max level-of-detail plot for 1 minute, 10 minutes and the whole record
+#
+#  usage: python -m benchmarks.bench_ecg_plot
+#
+
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from benchmarks.synthetic import synthetic_record
+from ecg.plotting import LodPlot
+from ecg_by_data import EcgSim
+
+
+def first_frame_plain(sim, ticks):
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(np.arange(ticks) / sim.frequency, sim.sample_mlii[:ticks], 'r-', linewidth=1.0)
+    fig.canvas.draw()
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return elapsed
+
+
+def first_frame_lod(sim, ticks):
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    LodPlot(ax, sim)
+    ax.set_xlim(0, ticks / sim.frequency)
+    fig.canvas.draw()
+    elapsed = time.perf_counter() - start
+
+    # a zoom into the middle re-queries the pyramid
+    start = time.perf_counter()
+    ax.set_xlim(ticks / sim.frequency / 2, ticks / sim.frequency / 2 + 5)
+    fig.canvas.draw()
+    zoomed = time.perf_counter() - start
+    plt.close(fig)
+    return elapsed, zoomed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = "data/100.dat"
+        if not os.path.exists(filename):
+            filename = os.path.join(tmp_dir, "synthetic.dat")
+            synthetic_record(filename)
+        sim = EcgSim(filename)
+        sim.load_data_212()
+
+        n = len(sim.sample_mlii)
+        for name, ticks in (("1 minute", 60 * sim.frequency), ("10 minutes", 600 * sim.frequency), ("whole record", n)):
+            ticks = min(ticks, n)
+            plain = first_frame_plain(sim, ticks)
+            lod, zoomed = first_frame_lod(sim, ticks)
+            print(f"{name:>12} ({ticks:7d} ticks): plain {plain * 1000:8.1f} ms, "
+                  f"lod {lod * 1000:7.1f} ms (incl. pyramid), zoom redraw {zoomed * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
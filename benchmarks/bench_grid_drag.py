@@ -0,0 +1,72 @@
+# Benchmark: cost of one drag event of the interpolation demo for growing control point grids
+#
+#  usage: python -m benchmarks.bench_grid_drag [events]
+#
+
+import sys
+import time
+
+import numpy as np
+
+from interpolation.bilinear import BilinearGrid
+from linear_interpolation_demo import rgb_to_hex
+
+
+def nonuniform_axis(rng, n, low=25, high=375):
+    steps = np.cumsum(rng.uniform(0.3, 1.0, n))
+    return low + (high - low) * (steps - steps[0]) / (steps[-1] - steps[0])
+
+
+def linear_scan(axis, p):
+    # cell lookup without binary search, for comparison
+    for i in range(len(axis) - 2):
+        if p < axis[i + 1]:
+            return i
+    return len(axis) - 2
+
+
+def drag_path(events):
+    # a zig-zag drag over the whole grid
+    t = np.linspace(0, 1, events)
+    return 25 + 350 * t, 25 + 350 * np.abs(np.sin(t * 20 * np.pi))
+
+
+def main(events=20000):
+    rng = np.random.default_rng(0)
+    xs_path, ys_path = drag_path(events)
+    path = list(zip(xs_path.tolist(), ys_path.tolist()))
+    for size in (2, 10, 100):
+        xs = nonuniform_axis(rng, size)
+        ys = nonuniform_axis(rng, size)
+        grid = BilinearGrid(rng.uniform(0, 255, (size, size, 3)), xs, ys)
+
+        start = time.perf_counter()
+        for x, y in path:
+            # what the demo does per drag event: the dot color and both intermediate row colors
+            n, m = grid.locate(x, y)
+            rgb_to_hex(*grid.value_at(x, y).astype(int))
+            grid.value_at(x, grid.y_list[n])
+            grid.value_at(x, grid.y_list[n + 1])
+        per_event = (time.perf_counter() - start) / events * 1e6
+
+        x_list = xs.tolist()
+        start = time.perf_counter()
+        for x, _ in path:
+            linear_scan(x_list, x)
+        scan = (time.perf_counter() - start) / events * 1e6
+        start = time.perf_counter()
+        for x, _ in path:
+            grid.locate(x, 0)
+        bisect = (time.perf_counter() - start) / events * 1e6
+
+        start = time.perf_counter()
+        for i in range(1000):
+            grid.set_value(i % size, (i * 7) % size, (i % 256, 0, 0))
+        recolor = (time.perf_counter() - start) / 1000 * 1e6
+
+        print(f"{size:3d}x{size:<3d} grid: {per_event:6.2f} us per drag event, "
+              f"cell lookup {bisect:.2f} us (linear scan {scan:.2f} us), {recolor:.1f} us per color change")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
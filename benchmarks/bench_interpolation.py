@@ -0,0 +1,55 @@
+# Benchmark: per-point color interpolation (as in the original demo) vs. the vectorized bilinear grid
+#
+#  usage: python -m benchmarks.bench_interpolation
+#
+
+import time
+
+import numpy as np
+
+from interpolation.bilinear import BilinearGrid
+from linear_interpolation_demo import hex_to_rgb, rgb_to_hex
+
+COLORS = [['#202020', '#e0e0e0'], ['#808080', '#404040']]
+BOUNDS = (25, 25, 375, 375)
+
+
+def classic_interpolate(colors, x, y, bounds=BOUNDS):
+    # one point at a time with hex strings and small arrays, like UIWindow.interpolate_color did
+    x0, y0, x1, y1 = bounds
+    right = (x1 - x) / (x1 - x0)
+    left = (x - x0) / (x1 - x0)
+    rgb0 = right * np.array(hex_to_rgb(colors[0][0])) + left * np.array(hex_to_rgb(colors[0][1]))
+    rgb1 = right * np.array(hex_to_rgb(colors[1][0])) + left * np.array(hex_to_rgb(colors[1][1]))
+    bottom = (y1 - y) / (y1 - y0)
+    top = (y - y0) / (y1 - y0)
+    r, g, b = bottom * rgb0 + top * rgb1
+    return rgb_to_hex(int(r), int(g), int(b))
+
+
+def main(repeat=20):
+    grid = BilinearGrid.uniform([[hex_to_rgb(color) for color in row] for row in COLORS], BOUNDS)
+
+    points = 10000
+    xs = np.random.default_rng(0).uniform(25, 375, points)
+    start = time.perf_counter()
+    for x in xs:
+        classic_interpolate(COLORS, x, x)
+    classic = (time.perf_counter() - start) / points * 1e6
+    start = time.perf_counter()
+    grid.interpolate(xs, xs)
+    vectorized = (time.perf_counter() - start) / points * 1e6
+    print(f"single points: {classic:.2f} us per point classic, {vectorized:.3f} us per point vectorized")
+
+    for size in (400, 800, 1600):
+        out = np.empty((size, size, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            grid.render(size, size, out=out)
+        render = (time.perf_counter() - start) / repeat * 1000
+        print(f"field {size}x{size}: {render:.2f} ms per render "
+              f"(classic estimate {classic * size * size / 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Benchmark: classic float level/window computation versus the lookup table engine
+#
+#  usage: python -m benchmarks.bench_levelwindow
+#
+
+import time
+
+import numpy as np
+
+from imaging.levelwindow import LevelWindowEngine
+
+
+def classic_level_window(image, level, window, slope=1.0, intercept=-1024.0):
+    # the original path: rescale to float HU, clip, scale, convert
+    image = slope * np.array(image, dtype=int) + intercept
+    min_val = level - (window / 2)
+    max_val = level + (window / 2)
+    windowed_image = np.clip(image, min_val, max_val)
+    windowed_image = ((windowed_image - (min_val)) / window) * 255
+    return windowed_image.astype(np.uint8)
+
+
+def synthetic_ct(size, seed=0):
+    # 12-bit stored values (0..4095) as int16, like most CT series
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[-1:1:size * 1j, -1:1:size * 1j]
+    body = (x ** 2 + y ** 2 < 0.8) * 1064 + (x ** 2 + (y * 1.5) ** 2 < 0.1) * 400
+    return np.clip(body + rng.normal(0, 20, (size, size)), 0, 4095).astype(np.int16)
+
+
+def main(repeats=50):
+    for size in (512, 1024, 2048, 4096):
+        image = synthetic_ct(size)
+        levels = np.linspace(-600, 400, repeats).round()
+
+        start = time.perf_counter()
+        for level in levels:
+            reference = classic_level_window(image, level, 400)
+        t_classic = (time.perf_counter() - start) / repeats
+
+        engine = LevelWindowEngine()
+        start = time.perf_counter()
+        engine.set_image(image, 1.0, -1024.0)
+        t_setup = time.perf_counter() - start
+        start = time.perf_counter()
+        for level in levels:
+            result = engine.render(level, 400)
+        t_lut = (time.perf_counter() - start) / repeats
+
+        assert np.array_equal(result, reference)
+        print(f"{size:4d}x{size:<4d}: classic {t_classic * 1000:7.2f} ms, lut {t_lut * 1000:6.2f} ms per tick "
+              f"({t_classic / t_lut:4.1f}x), one-time setup {t_setup * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
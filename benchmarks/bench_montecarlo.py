@@ -0,0 +1,50 @@
+# Benchmark: Monte Carlo pi samples/s, single process vs. parallel runner for growing worker counts
+#
+#  usage: python -m benchmarks.bench_montecarlo [samples]
+#
+
+import os
+import random
+import sys
+import time
+
+from montecarlo.engine import MonteCarloPi
+from montecarlo.parallel import ParallelPi
+
+
+def classic(n):
+    # one random.random() pair per point, like the original demo without the drawing
+    inside = 0
+    for _ in range(n):
+        x = random.random() * 2 - 1
+        y = random.random() * 2 - 1
+        if x ** 2 + y ** 2 <= 1:
+            inside += 1
+    return inside
+
+
+def main(samples=200_000_000):
+    start = time.perf_counter()
+    classic(1_000_000)
+    print(f"random.random loop:     {1 / (time.perf_counter() - start):8.1f} M samples/s")
+
+    start = time.perf_counter()
+    MonteCarloPi(0).run(samples // 4)
+    print(f"engine, 1 process:      {samples / 4 / (time.perf_counter() - start) / 1e6:8.1f} M samples/s")
+
+    cores = os.cpu_count() or 1
+    workers = 1
+    while True:
+        runner = ParallelPi(0, workers)
+        start = time.perf_counter()
+        counts = runner.run(samples)
+        elapsed = time.perf_counter() - start
+        print(f"parallel, {workers:2d} workers:   {counts.total / elapsed / 1e6:8.1f} M samples/s "
+              f"({cores} cores), pi ~ {counts.estimate:.6f}")
+        if workers >= cores:
+            break
+        workers = min(2 * workers, cores)
+
+
+if __name__ == "__main__":
+    main(int(float(sys.argv[1])) if len(sys.argv) > 1 else 200_000_000)
@@ -0,0 +1,35 @@
+# Benchmark: per-batch display cost of the Monte Carlo density raster while the point count grows
+#
+#  usage: python -m benchmarks.bench_montecarlo_raster [total points]
+#
+
+import sys
+import time
+
+from montecarlo.engine import MonteCarloPi
+from montecarlo.raster import DensityRaster
+
+
+def main(total=10_000_000, batch=100_000):
+    engine = MonteCarloPi(0)
+    raster = DensityRaster(400, 400)
+    report = batch
+    while engine.counts.total < total:
+        points, inside = engine.draw(batch)
+        start = time.perf_counter()
+        raster.add(points, inside)
+        added = time.perf_counter() - start
+        start = time.perf_counter()
+        raster.render(heat=False)
+        dots = time.perf_counter() - start
+        start = time.perf_counter()
+        raster.render(heat=True)
+        heat = time.perf_counter() - start
+        if engine.counts.total >= report:
+            print(f"{engine.counts.total:10d} points: add {added * 1000:.2f} ms per {batch} points, "
+                  f"render dots {dots * 1000:.2f} ms, heat {heat * 1000:.2f} ms")
+            report *= 10
+
+
+if __name__ == "__main__":
+    main(int(float(sys.argv[1])) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,39 @@
+# Benchmark: re-rendering axial, coronal and sagittal planes for crosshair moves
+#
+#  usage: python -m benchmarks.bench_mpr [slices] [size]
+#
+
+import sys
+import time
+
+import numpy as np
+
+from imaging.levelwindow import LevelWindowEngine
+from imaging.mpr import PLANES, MprVolume
+
+
+def main(n_slices=600, size=512, moves=50):
+    rng = np.random.default_rng(0)
+    volume = rng.integers(-1024, 2000, (n_slices, size, size), dtype=np.int16)
+    engine = LevelWindowEngine()
+
+    for max_size in (None, 400):
+        mpr = MprVolume(volume, (0.7, 0.7, 1.25), engine, max_size)
+        times = []
+        for i in range(moves):
+            plane = PLANES[i % 3]
+            height, width = mpr.geometry[plane].display_shape
+            start = time.perf_counter()
+            changed = mpr.set_from_plane(plane, rng.integers(height), rng.integers(width))
+            for p in changed:
+                mpr.render(p, 40, 400)
+            times.append(time.perf_counter() - start)
+        times = np.array(times) * 1000
+        shapes = ", ".join(f"{p} {mpr.geometry[p].display_shape[1]}x{mpr.geometry[p].display_shape[0]}" for p in PLANES)
+        print(f"{size}x{size}x{n_slices}, display {shapes}: "
+              f"{times.mean():.2f} ms avg, {times.max():.2f} ms max per crosshair move")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 600,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 512)
@@ -0,0 +1,55 @@
+# Benchmark of the Pan-Tompkins QRS detector in batch and streaming mode
+#
+#  Batch: one call over the whole 30 minute record. Streaming: the same record in chunks as pushed
+#  by the ECG server. With the synthetic record the detected peaks are also checked against the truth.
+#
+#  usage: python -m benchmarks.bench_qrs [chunk_size]
+#
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_record
+from ecg.qrs import QrsDetector, detect_r_peaks, heart_rate
+from ecg_by_data import EcgSim
+
+
+def main(chunk_size=36):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = "data/100.dat"
+        truth = None
+        if not os.path.exists(filename):
+            filename = os.path.join(tmp_dir, "synthetic.dat")
+            truth = synthetic_record(filename)
+        sim = EcgSim(filename)
+        sim.load_data_212()
+        samples = sim.sample_mlii
+
+        start = time.perf_counter()
+        peaks = detect_r_peaks(samples, sim.frequency)
+        t_batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector = QrsDetector(sim.frequency)
+        streamed = [detector.process(samples[i:i + chunk_size]) for i in range(0, len(samples), chunk_size)]
+        streamed = np.concatenate(streamed + [detector.flush()])
+        t_stream = time.perf_counter() - start
+
+        rr_ms, bpm = heart_rate(peaks, sim.frequency)
+        minutes = len(samples) / sim.frequency / 60
+        print(f"{minutes:.1f} min record, {len(peaks)} beats, mean heart rate {np.mean(bpm):.1f} bpm")
+        print(f"  batch:                  {t_batch * 1000:8.1f} ms")
+        print(f"  streaming ({chunk_size:4d} ticks): {t_stream * 1000:8.1f} ms, "
+              f"{t_stream / (len(samples) / chunk_size) * 1e6:.1f} us per chunk, "
+              f"identical to batch: {np.array_equal(peaks, streamed)}")
+        if truth is not None:
+            distance = np.abs(peaks[:, None] - truth[None, :]).min(axis=0)
+            print(f"  sensitivity (+-50 ms):  {np.mean(distance <= 0.05 * sim.frequency) * 100:8.2f} %")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 36)
@@ -0,0 +1,38 @@
+# Benchmark: closed-form registration of 10 to 100k landmark pairs for all transform models
+#
+#  usage: python -m benchmarks.bench_registration
+#
+
+import time
+
+import numpy as np
+
+from registration.solver import MODELS, register
+
+
+def landmarks(n, rng, noise=0.5):
+    # template points and reference points under a known similarity transform plus noise
+    source = rng.uniform(0, 500, (n, 2))
+    angle = np.radians(12)
+    matrix = 1.1 * np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    target = source @ matrix.T + (25, -40) + rng.normal(0, noise, (n, 2))
+    return source, target
+
+
+def main(repeat=20):
+    rng = np.random.default_rng(0)
+    print("points  " + "".join(f"{model:>14s}" for model in MODELS) + "   (ms per registration, FRE rms)")
+    for n in (10, 100, 1000, 10000, 100000):
+        source, target = landmarks(n, rng)
+        cells = []
+        for model in MODELS:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = register(source, target, model)
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            cells.append(f"{elapsed:7.3f} {result.rms:6.2f}")
+        print(f"{n:6d}  " + "".join(f"{cell:>14s}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Benchmark of the DICOM series loader: scan, first slice, scrolling with prefetch and full volume decode
+#
+#  usage: python -m benchmarks.bench_series [slices] [size]
+#
+
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_dicom import write_series
+from imaging.series import DicomSeries, decode_slice
+
+
+def main(n_slices=200, size=512):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_series(tmp_dir, n_slices, size)
+
+        start = time.perf_counter()
+        series = DicomSeries(tmp_dir, cache_bytes=64 * size * size * 2)
+        t_scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        series.get_slice(0)
+        t_first = time.perf_counter() - start
+
+        # scroll at 60 slices per second, the time per get_slice is what the UI thread pays
+        waits = []
+        for index in range(1, n_slices):
+            start = time.perf_counter()
+            series.get_slice(index)
+            waits.append(time.perf_counter() - start)
+            time.sleep(max(0.0, 1 / 60 - waits[-1]))
+        waits = np.array(waits) * 1000
+        cache_mb = series.cache.bytes / 2 ** 20
+
+        start = time.perf_counter()
+        for info in series.slices:
+            decode_slice(info)
+        t_serial = time.perf_counter() - start
+
+        series.cache.clear()        # cold start like the serial decode, not from the scrolled slices
+        start = time.perf_counter()
+        volume = series.read_volume()
+        t_volume = time.perf_counter() - start
+        series.close()
+
+        print(f"{n_slices} slices of {size}x{size}")
+        print(f"  scan (headers only):  {t_scan * 1000:8.1f} ms")
+        print(f"  first slice:          {t_first * 1000:8.1f} ms")
+        print(f"  scrolling, per slice: {waits.mean():8.2f} ms avg, p95 {np.percentile(waits, 95):.2f} ms, "
+              f"max {waits.max():.2f} ms, cache {cache_mb:.0f} MB")
+        print(f"  volume, serial:       {t_serial * 1000:8.1f} ms")
+        print(f"  volume, thread pool:  {t_volume * 1000:8.1f} ms ({volume.nbytes / 2 ** 20:.0f} MB, "
+              f"contiguous {volume.flags.c_contiguous})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 512)
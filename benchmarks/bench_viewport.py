@@ -0,0 +1,50 @@
+# Benchmark: windowing a large image as a whole vs. the tiled zoom/pan viewport
+#
+#  usage: python -m benchmarks.bench_viewport [width] [height]
+#
+
+import sys
+import time
+
+import numpy as np
+
+from imaging.levelwindow import LevelWindowEngine
+from imaging.viewport import Viewport
+
+
+def timed(function, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(i)
+        times.append(time.perf_counter() - start)
+    return np.mean(times) * 1000
+
+
+def main(width=4000, height=3000, view=(520, 420), repeat=50):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 4096, (height, width), dtype=np.uint16)
+    engine = LevelWindowEngine()
+    engine.set_image(image)
+
+    full = timed(lambda i: engine.render(2000 + i, 1000), repeat)
+    print(f"{f'{width}x{height} full image' + ':':<38}{full:7.2f} ms per level change")
+
+    viewport = Viewport(engine, *view)
+    viewport.set_image(image.shape)
+    fit = timed(lambda i: viewport.render(2000 + i, 1000), repeat)
+    print(f"{f'viewport {view[0]}x{view[1]}, fit ({viewport.zoom:.2f}x):':<38}{fit:7.2f} ms per level change")
+
+    viewport.zoom_at(1 / viewport.zoom, 0, 0)
+    zoom1 = timed(lambda i: viewport.render(2000 + i, 1000), repeat)
+    print(f"{'viewport, zoom 1x:':<38}{zoom1:7.2f} ms per level change")
+
+    viewport.cache.hits = viewport.cache.misses = 0
+    pan = timed(lambda i: (viewport.pan(-25, -10), viewport.render(2000, 1000)), repeat)
+    print(f"{'viewport, zoom 1x, panning:':<38}{pan:7.2f} ms per 25 px drag step "
+          f"({viewport.cache.hits / max(1, viewport.cache.hits + viewport.cache.misses):.0%} tile cache hits)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 3000)
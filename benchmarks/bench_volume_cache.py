@@ -0,0 +1,48 @@
+# Benchmark: cold open (scan + decode of all slices) versus warm open from the memory-mapped volume cache
+#
+#  usage: python -m benchmarks.bench_volume_cache [slices] [size]
+#
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_dicom import write_series
+from imaging.series import DicomSeries
+from imaging.volumecache import VolumeCache
+
+
+def main(n_slices=200, size=512):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        series_dir = os.path.join(tmp_dir, "series")
+        write_series(series_dir, n_slices, size)
+        cache = VolumeCache(os.path.join(tmp_dir, "cache"))
+
+        start = time.perf_counter()
+        series = DicomSeries(series_dir, volume_cache=cache)
+        cold_volume = np.array(series.read_volume())
+        t_cold = time.perf_counter() - start
+        series.close()
+
+        start = time.perf_counter()
+        series = DicomSeries(series_dir, volume_cache=cache)
+        t_warm_open = time.perf_counter() - start
+        start = time.perf_counter()
+        middle = np.array(series.get_slice(n_slices // 2))
+        t_warm_slice = time.perf_counter() - start
+        assert series.volume is not None and np.array_equal(middle, cold_volume[n_slices // 2])
+        assert np.array_equal(series.volume, cold_volume)
+        series.close()
+
+        print(f"{n_slices} slices of {size}x{size}, cache {cache.size() / 2 ** 20:.0f} MB")
+        print(f"  cold open (decode + store): {t_cold * 1000:8.1f} ms")
+        print(f"  warm open (stat + memmap):  {t_warm_open * 1000:8.1f} ms")
+        print(f"  first slice from memmap:    {t_warm_slice * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 512)
@@ -0,0 +1,81 @@
+# Load test for the asyncio ECG server on localhost
+#
+#  Starts an EcgServer on a free local port and lets many concurrent clients query it, half of them in
+#  the legacy one-sample-per-request mode and half in the framed batch mode.
+#
+#  usage: python -m benchmarks.load_ecg_server [n_clients] [seconds]
+#
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_record
+from ecg.server import EcgClient, EcgServer
+from ecg_by_data import EcgSim
+
+
+async def legacy_client(port, deadline, stats):
+    client = await EcgClient.connect("127.0.0.1", port)
+    ms = 0
+    while time.perf_counter() < deadline:
+        await client.get_sample(ms)
+        ms += 20
+        stats['legacy_requests'] += 1
+        stats['samples'] += 1
+    await client.close()
+
+
+async def framed_client(port, deadline, stats, count=3600):
+    client = await EcgClient.connect("127.0.0.1", port)
+    ms = 0
+    while time.perf_counter() < deadline:
+        block = await client.get_batch(ms, count, 1000 / 360, leads=(0, 1))
+        ms += 10000
+        stats['framed_requests'] += 1
+        stats['samples'] += block.size
+    await client.close()
+
+
+async def run(sim, n_clients, seconds):
+    server = await EcgServer(sim, "127.0.0.1", 0, verbose=False).start()
+    stats = dict(legacy_requests=0, framed_requests=0, samples=0)
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    clients = [legacy_client(server.port, deadline, stats) if i % 2 == 0 else framed_client(server.port, deadline, stats)
+               for i in range(n_clients)]
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+
+    # check that the framed block matches the local lookup
+    client = await EcgClient.connect("127.0.0.1", server.port)
+    block = await client.get_batch(1000, 100, 2.5, leads=(1,))
+    assert np.array_equal(block[:, 0], sim.get_samples('V1', 1000 + np.arange(100) * 2.5))
+    await client.close()
+    await server.close()
+
+    print(f"{n_clients} clients, {elapsed:.1f} s")
+    print(f"  legacy requests: {stats['legacy_requests'] / elapsed:10.0f} / s")
+    print(f"  framed requests: {stats['framed_requests'] / elapsed:10.0f} / s")
+    print(f"  samples served:  {stats['samples'] / elapsed:10.0f} / s")
+
+
+def main(n_clients=32, seconds=3.0):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = "data/100.dat"
+        if not os.path.exists(filename):
+            filename = os.path.join(tmp_dir, "synthetic.dat")
+            synthetic_record(filename)
+        sim = EcgSim(filename)
+        sim.load_data_212()
+        asyncio.run(run(sim, n_clients, seconds))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 3.0)
@@ -0,0 +1,77 @@
+# Push-mode streaming check for the asyncio ECG server on localhost
+#
+#  Subscribes many clients at a given speed and measures the delivered sample rate per subscriber.
+#  One extra subscriber never reads, to show that a slow client only loses its own chunks.
+#
+#  usage: python -m benchmarks.stream_ecg_server [n_subscribers] [speed] [chunk_size] [seconds]
+#
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_record
+from ecg.server import EcgClient, EcgServer
+from ecg_by_data import EcgSim
+
+
+async def subscriber(port, speed, chunk_size, seconds, results):
+    client = await EcgClient.connect("127.0.0.1", port)
+    await client.subscribe(0, speed=speed, lead=0, chunk_size=chunk_size)
+    received = 0
+    gaps = 0
+    expected = None
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        first, chunk = await client.read_chunk()
+        if expected is not None and first != expected:
+            gaps += 1
+        expected = first + len(chunk)
+        received += len(chunk)
+    elapsed = time.perf_counter() - start
+    await client.unsubscribe()
+    await client.close()
+    results.append((received / elapsed, gaps))
+
+
+async def stalled_subscriber(port, speed, seconds):
+    client = await EcgClient.connect("127.0.0.1", port)
+    await client.subscribe(0, speed=speed, lead=0, chunk_size=1)
+    await asyncio.sleep(seconds)
+    await client.close()
+
+
+async def run(sim, n_subscribers, speed, chunk_size, seconds):
+    server = await EcgServer(sim, "127.0.0.1", 0, verbose=False).start()
+    results = []
+    await asyncio.gather(stalled_subscriber(server.port, 100.0, seconds),
+                         *[subscriber(server.port, speed, chunk_size, seconds, results) for _ in range(n_subscribers)])
+    await server.close()
+
+    rates = [rate for rate, _ in results]
+    target = sim.frequency * speed
+    print(f"{n_subscribers} subscribers at {speed}x, chunk size {chunk_size}, {seconds} s")
+    print(f"  target rate:   {target:10.1f} samples/s")
+    print(f"  received rate: {min(rates):10.1f} - {max(rates):.1f} samples/s")
+    print(f"  gaps:          {sum(gaps for _, gaps in results)}")
+
+
+def main(n_subscribers=50, speed=1.0, chunk_size=36, seconds=5.0):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = "data/100.dat"
+        if not os.path.exists(filename):
+            filename = os.path.join(tmp_dir, "synthetic.dat")
+            synthetic_record(filename)
+        sim = EcgSim(filename)
+        sim.load_data_212()
+        asyncio.run(run(sim, n_subscribers, speed, chunk_size, seconds))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 50,
+         float(args[1]) if len(args) > 1 else 1.0,
+         int(args[2]) if len(args) > 2 else 36,
+         float(args[3]) if len(args) > 3 else 5.0)
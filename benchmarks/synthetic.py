@@ -0,0 +1,56 @@
+# Synthetic ECG records for the benchmarks (used when data/100.dat is not available)
+#
+#  Beats with a jittered RR interval around 72 bpm, each with a narrow QRS spike and a wide T wave,
+#  on top of baseline wander, noise and an ADC offset of 1024.
+#
+
+import os
+
+import numpy as np
+
+from ecg.format212 import encode_212
+
+
+def synthetic_ecg(minutes=30, frequency=360, seed=0):
+    # returns int16 samples of shape (ticks, 2) and the true R-peak ticks
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * frequency)
+    beats = np.cumsum(rng.normal(60 / 72, 0.05, int(minutes * 60 * 1.5) + 2))
+    beats = (beats[beats < n / frequency - 1] * frequency).astype(np.int64)
+
+    impulses = np.zeros(n)
+    impulses[beats] = 1.0
+    t = np.arange(-frequency // 2, frequency // 2)
+    qrs = 900 * np.exp(-(t / (0.008 * frequency)) ** 2)
+    t_wave = 150 * np.exp(-((t - 0.25 * frequency) / (0.04 * frequency)) ** 2)
+    mlii = np.convolve(impulses, qrs + t_wave, 'same')
+    baseline = 20 * np.sin(2 * np.pi * 0.3 * np.arange(n) / frequency)
+    mlii += baseline + rng.normal(0, 8, n) + 1024
+
+    v1 = 1024 - 0.5 * (mlii - 1024) + rng.normal(0, 8, n)
+    samples = np.stack([mlii, v1], axis=1).round().clip(-2048, 2047).astype(np.int16)
+    return samples, beats
+
+
+def synthetic_record(filename, minutes=30, frequency=360, seed=0):
+    samples, beats = synthetic_ecg(minutes, frequency, seed)
+    with open(filename, "wb") as f:
+        f.write(encode_212(samples))
+    return beats
+
+
+def synthetic_database(directory, count=48, minutes=30, frequency=360):
+    # writes count two-lead records (format 212 with .hea header) named 900, 901, ...
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for i in range(count):
+        name = str(900 + i)
+        samples, _ = synthetic_ecg(minutes, frequency, seed=i)
+        with open(os.path.join(directory, name + ".dat"), "wb") as f:
+            f.write(encode_212(samples))
+        with open(os.path.join(directory, name + ".hea"), "w") as f:
+            f.write(f"{name} 2 {frequency} {len(samples)}\n")
+            f.write(f"{name}.dat 212 200 11 1024 {samples[0, 0]} 0 0 MLII\n")
+            f.write(f"{name}.dat 212 200 11 1024 {samples[0, 1]} 0 0 V1\n")
+        names.append(name)
+    return names
@@ -0,0 +1,53 @@
+# Synthetic CT series written with pydicom, for the imaging benchmarks
+#
+#  Slices are written in shuffled file order with ImagePositionPatient/InstanceNumber set, so the
+#  series loader has to sort them.
+#
+
+import os
+
+import numpy as np
+import pydicom
+from pydicom.dataset import FileDataset, FileMetaDataset
+from pydicom.uid import CTImageStorage, ExplicitVRLittleEndian, generate_uid
+
+from benchmarks.bench_levelwindow import synthetic_ct
+
+
+def write_series(directory, n_slices=64, size=256, spacing=(0.7, 0.7, 1.25), seed=0):
+    # returns the SeriesInstanceUID; stored values are 12-bit with RescaleIntercept -1024
+    os.makedirs(directory, exist_ok=True)
+    series_uid = generate_uid()
+    study_uid = generate_uid()
+    order = np.random.default_rng(seed).permutation(n_slices)
+    for file_idx, i in enumerate(order):
+        meta = FileMetaDataset()
+        meta.MediaStorageSOPClassUID = CTImageStorage
+        meta.MediaStorageSOPInstanceUID = generate_uid()
+        meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+        filename = os.path.join(directory, f"IM{file_idx:05d}.dcm")
+        ds = FileDataset(filename, {}, file_meta=meta, preamble=b"\0" * 128)
+        ds.SOPClassUID = CTImageStorage
+        ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+        ds.StudyInstanceUID = study_uid
+        ds.SeriesInstanceUID = series_uid
+        ds.Modality = "CT"
+        ds.InstanceNumber = int(i) + 1
+        ds.ImagePositionPatient = [0.0, 0.0, float(i * spacing[2])]
+        ds.ImageOrientationPatient = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+        ds.PixelSpacing = [spacing[0], spacing[1]]
+        ds.SliceThickness = spacing[2]
+        ds.Rows = size
+        ds.Columns = size
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.BitsAllocated = 16
+        ds.BitsStored = 12
+        ds.HighBit = 11
+        ds.PixelRepresentation = 0
+        ds.RescaleSlope = 1
+        ds.RescaleIntercept = -1024
+        ds.PixelData = synthetic_ct(size, seed=int(i)).astype(np.uint16).tobytes()
+        pydicom.dcmwrite(filename, ds, enforce_file_format=True)
+    return series_uid
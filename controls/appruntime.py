@@ -0,0 +1,179 @@
+import queue
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from controls.renderscheduler import RenderStats
+
+
+class LoopStats:
+    # task times and start delays (RenderStats), plus how late the heartbeat fires and the cpu load
+    def __init__(self, history=240):
+        self.tasks = RenderStats(history)
+        self.lags = np.zeros(history)
+        self.beats = 0
+        self.cpu = 0.0      # share of one core used by the process since the last heartbeat
+
+    def heartbeat(self, lag, cpu):
+        self.lags[self.beats % len(self.lags)] = lag
+        self.beats += 1
+        self.cpu = cpu
+
+    def summary(self):
+        n = min(self.beats, len(self.lags))
+        lag = self.lags[:n].mean() * 1000 if n else 0.0
+        tasks = self.tasks
+        m = min(tasks.count, len(tasks.render_times))
+        task = tasks.render_times[:m].mean() * 1000 if m else 0.0
+        return f"tasks {task:.1f} ms avg ({tasks.count} run), loop lag {lag:.1f} ms, cpu {self.cpu:.0%}"
+
+
+class AppRuntime:
+    # event driven application loop on top of Tk's own mainloop: work is scheduled with after(), results
+    # of background threads come back through a queue that is polled on the Tk thread (Tk itself must
+    # only be used from there), and shutdown() stops everything in order
+    def __init__(self, root, heartbeat_ms=500, poll_ms=50, busy_poll_ms=10, workers=1):
+        self.root = root
+        self.heartbeat_ms = heartbeat_ms
+        self.poll_ms = poll_ms
+        self.busy_poll_ms = busy_poll_ms
+        self.stats = LoopStats()
+        self.results = queue.Queue()        # callables posted by other threads, run on the Tk thread
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = 0
+        self.scheduled = dict()             # task id -> after id
+        self.next_task = 0
+        self.shutdown_hooks = []
+        self.closing = False
+        self.last_beat = None
+        self.root.protocol("WM_DELETE_WINDOW", self.shutdown)
+
+    def after(self, delay_ms, callback, *args):
+        # runs callback once on the Tk thread, returns a task id for cancel()
+        task = self.next_task
+        self.next_task += 1
+        due = time.perf_counter() + delay_ms / 1000
+
+        def run():
+            self.scheduled.pop(task, None)
+            self._timed(callback, args, due)
+        self.scheduled[task] = self.root.after(delay_ms, run)
+        return task
+
+    def every(self, interval_ms, callback, *args):
+        # runs callback every interval_ms until cancel(); the next run is planned after the current one
+        task = self.next_task
+        self.next_task += 1
+
+        def run(due):
+            try:
+                self._timed(callback, args, due)
+            finally:
+                # a failing run is reported by Tk, the task keeps running
+                if task in self.scheduled and not self.closing:
+                    self.scheduled[task] = self.root.after(interval_ms, run, time.perf_counter() + interval_ms / 1000)
+        self.scheduled[task] = self.root.after(interval_ms, run, time.perf_counter() + interval_ms / 1000)
+        return task
+
+    def cancel(self, task):
+        after_id = self.scheduled.pop(task, None)
+        if after_id is not None:
+            self.root.after_cancel(after_id)
+
+    def _timed(self, callback, args, due):
+        start = time.perf_counter()
+        callback(*args)
+        self.stats.tasks.add(time.perf_counter() - start, max(start - due, 0.0))
+
+    def post(self, callback, *args):
+        # thread-safe: callback(*args) is run on the Tk thread at the next poll
+        self.results.put((callback, args))
+
+    def run_in_background(self, function, *args, on_done=None, on_error=None):
+        # runs function(*args) on a worker thread; on_done(result) or on_error(exception) on the Tk thread
+        if self.closing:
+            return None
+        self.jobs += 1
+
+        def finished(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self.post(self._job_done, on_error, error)
+            else:
+                self.post(self._job_done, on_done, future.result())
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(finished)
+        return future
+
+    def _job_done(self, callback, value):
+        self.jobs -= 1
+        if callback is not None:
+            callback(value)
+        elif isinstance(value, BaseException):
+            raise value
+
+    @property
+    def busy(self):
+        return self.jobs > 0
+
+    def _poll(self):
+        # drains the queue of posted callbacks; polls faster while background jobs are running. A failing
+        # callback is reported like any Tk callback error and neither stops the others nor the polling.
+        try:
+            while True:
+                try:
+                    callback, args = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(*args)
+                except Exception as e:
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+        finally:
+            if not self.closing:
+                self.root.after(self.busy_poll_ms if self.jobs else self.poll_ms, self._poll)
+
+    def _heartbeat(self):
+        # lag: how much later than planned the event loop got to the heartbeat; cpu: process time used
+        # since the last heartbeat per wall time, close to 0 while the application is idle
+        now = time.perf_counter()
+        cpu = time.process_time()
+        if self.last_beat is not None:
+            then, cpu_then = self.last_beat
+            lag = now - then - self.heartbeat_ms / 1000
+            self.stats.heartbeat(max(lag, 0.0), (cpu - cpu_then) / max(now - then, 1e-9))
+        self.last_beat = (now, cpu)
+        if not self.closing:
+            self.root.after(self.heartbeat_ms, self._heartbeat)
+
+    def on_shutdown(self, callback):
+        self.shutdown_hooks.append(callback)
+
+    def shutdown(self):
+        # stops the scheduled tasks and background jobs, runs the shutdown hooks and ends the mainloop
+        if self.closing:
+            return
+        self.closing = True
+        for after_id in self.scheduled.values():
+            self.root.after_cancel(after_id)
+        self.scheduled.clear()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for callback in reversed(self.shutdown_hooks):
+            callback()
+        self.root.quit()
+
+    def mainloop(self):
+        self._poll()
+        self._heartbeat()
+        try:
+            self.root.mainloop()
+        finally:
+            self.shutdown()
+            try:
+                self.root.destroy()
+            except tk.TclError:
+                pass    # already destroyed
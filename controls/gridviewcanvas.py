@@ -53,6 +53,7 @@ class GridViewCanvas(tk.Canvas):
                 if marker.translation:
                     self.delete(marker.translation)
         self.marker_lists.clear()
+        self.clear_registration()
         self.counter = 0
         # self.modified = False
 
@@ -101,6 +102,18 @@ class GridViewCanvas(tk.Canvas):
             self.delete(self.marker_lists['default'][point_idx].translation)
         self.marker_lists['default'][point_idx].translation = vector
 
+    def show_registration(self, mapped_points, color='orange'):
+        # mapped template points as small circles with their residual vectors to the markers
+        self.clear_registration()
+        r = max(self.marker_radius_px // 2, 2)
+        for marker, (x, y) in zip(self.marker_lists.get('default', []), mapped_points):
+            self.create_oval(x - r, y - r, x + r, y + r, outline=color, width=2, tags='registration')
+            self.create_line(x, y, marker.position[0], marker.position[1], fill=color, arrow=tk.LAST,
+                             tags='registration')
+
+    def clear_registration(self):
+        self.delete('registration')
+
     def __on_mouse_press(self, event):
         canvas_click = [self.canvasx(event.x), self.canvasy(event.y)]
 
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+
+
+class RenderStats:
+    # keeps the last render times and request-to-display latencies in fixed-size arrays
+    def __init__(self, history=240):
+        self.render_times = np.zeros(history)
+        self.latencies = np.zeros(history)
+        self.count = 0
+        self.requests = 0
+
+    def add(self, render_time, latency):
+        self.render_times[self.count % len(self.render_times)] = render_time
+        self.latencies[self.count % len(self.latencies)] = latency
+        self.count += 1
+
+    def summary(self):
+        n = min(self.count, len(self.render_times))
+        if n == 0:
+            return "no renders yet"
+        render = self.render_times[:n] * 1000
+        latency = self.latencies[:n] * 1000
+        return (f"render {render.mean():.1f} ms (max {render.max():.1f}), "
+                f"latency {latency.mean():.1f} ms (p95 {np.percentile(latency, 95):.1f}), "
+                f"{self.count}/{self.requests} requests rendered")
+
+
+class RenderScheduler:
+    # coalesces render requests: any number of request() calls between two frames lead to one callback,
+    # executed via after_idle once Tk has processed the pending events, and never more often than fps
+    def __init__(self, widget, callback, fps=60):
+        self.widget = widget
+        self.callback = callback        # called with the set of keys requested since the last render
+        self.min_interval = 1.0 / fps
+        self.stats = RenderStats()
+        self.dirty = set()
+        self.scheduled = None
+        self.first_request = None
+        self.last_render = 0.0
+
+    def request(self, *keys):
+        self.stats.requests += 1
+        self.dirty.update(keys or (None,))
+        if self.scheduled is not None:
+            return
+        now = time.perf_counter()
+        self.first_request = now
+        wait = self.last_render + self.min_interval - now
+        if wait > 0:
+            self.scheduled = self.widget.after(max(1, int(wait * 1000)), self._idle)
+        else:
+            self.scheduled = self.widget.after_idle(self._run)
+
+    def _idle(self):
+        # the frame interval has passed, now wait until the event queue is empty
+        self.scheduled = self.widget.after_idle(self._run)
+
+    def _run(self):
+        self.scheduled = None
+        keys, self.dirty = self.dirty, set()
+        start = time.perf_counter()
+        self.callback(keys)
+        self.last_render = time.perf_counter()
+        self.stats.add(self.last_render - start, self.last_render - self.first_request)
+
+    def cancel(self):
+        if self.scheduled is not None:
+            self.widget.after_cancel(self.scheduled)
+            self.scheduled = None
+        self.dirty = set()
@@ -12,7 +12,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from controls import gridviewcanvas
-import time
+from controls.appruntime import AppRuntime
+from registration.solver import MODELS, register_pairs
 from PIL import Image, ImageTk
 from io import BytesIO
 import numpy as np
@@ -21,7 +22,7 @@ import numpy as np
 class UIRegistrationDemo:
     def __init__(self):
         self.window = tk.Tk()
-        self.running = True
+        self.runtime = AppRuntime(self.window)
         self.window.title("Registration Demo")
         self.window.geometry("1200x890")
         self.window.configure(bg="black")
@@ -33,6 +34,10 @@ class UIRegistrationDemo:
 
         self.synchronize = tk.BooleanVar()
         self.synchronize.set(False)
+        self.model = tk.StringVar()
+        self.model.set('rigid')
+        self.result_label = None
+        self.result_text = None
 
         self.create_controls()
 
@@ -66,6 +71,16 @@ class UIRegistrationDemo:
         ttk.Button(tab_params, text='Clear all', command=self.clear_all).grid(column=0, row=2, sticky='NE')
         ttk.Button(tab_params, text='Copy points from Template to Reference', command=self.copy_points).grid(column=1, row=2, sticky='NE')
         tk.Button(tab_params, text='Calculate Translation', command=self.on_calculate_translation).grid(column=0, row=3, sticky='NWE')
+        ttk.Combobox(tab_params, textvariable=self.model, values=MODELS, state='readonly').grid(column=2, row=3, sticky='NWE')
+        tk.Button(tab_params, text='Calculate Registration', command=self.on_calculate_registration).grid(column=3, row=3, sticky='NWE')
+        self.result_label = tk.Label(tab_params, text='', justify=tk.LEFT, font='TkFixedFont')
+        self.result_label.grid(column=0, columnspan=4, row=4, sticky='NW')
+
+        # transform and per point residuals of the last registration
+        self.result_text = tk.Text(tab_results, font='TkFixedFont')
+        self.result_text.grid(column=0, row=0, sticky='NSWE')
+        tab_results.grid_columnconfigure(0, weight=1)
+        tab_results.grid_rowconfigure(0, weight=1)
 
     def clear_all(self):
         if tk.messagebox.askyesno(message='Really clear all points?'):
@@ -104,18 +119,30 @@ class UIRegistrationDemo:
         for i in range(trans.shape[0]):
             self.canvas_template.set_translation(i, trans[i])
 
+    def on_calculate_registration(self):
+        # least squares transform template -> reference, the residual vectors are shown in the reference
+        pointpairs = self.create_paired_pointlist()
+        try:
+            result = register_pairs(pointpairs, self.model.get())
+        except ValueError as e:
+            tk.messagebox.showinfo(message=str(e))
+            return
+        self.canvas_reference.show_registration(result.mapped)
+        self.result_label.config(text=result.summary())
+
+        lines = [result.summary(), "", "point   template            reference           residual          FRE"]
+        for i, ((p, q), r, fre) in enumerate(zip(pointpairs, result.residuals, result.fre)):
+            lines.append(f"{i:5d}   ({p[0]:7.1f}, {p[1]:7.1f})  ({q[0]:7.1f}, {q[1]:7.1f})  "
+                         f"({r[0]:7.2f}, {r[1]:7.2f})  {fre:7.3f}")
+        self.result_text.delete('1.0', tk.END)
+        self.result_text.insert(tk.END, "\n".join(lines))
+
     def on_quit(self):
-        self.running = False
-        self.window.quit()
+        self.runtime.shutdown()
 
     def mainloop(self):
-        while self.running:
-            self.window.update_idletasks()
-            self.window.update()
-            # react on when training thread is finished
-            # if not self.queue.empty() and self.queue.get_nowait() == 1:
-            #    self.update_results()
-            time.sleep(0.1)
+        # Tk's own event loop, background calculations report back through self.runtime
+        self.runtime.mainloop()
 
 
 def decode_image(image_data):
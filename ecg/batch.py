@@ -0,0 +1,218 @@
+# Parallel batch processing of a whole ECG database directory
+#
+#  usage: python -m ecg.batch <directory> [--task decode|resample|export|qrs] [--workers N]
+#                             [--delta-ms 20] [--format raw] [--out <directory>]
+#
+#  Records are discovered by their .hea headers and processed on a ProcessPoolExecutor. Array results
+#  are not pickled back: if the caller keeps them (run_batch(..., keep=True)), the parent allocates
+#  one shared memory block per record, the worker writes its result directly into it and only returns
+#  a few numbers. Otherwise (e.g. a pure throughput benchmark) the worker computes into a local array
+#  that is dropped. The command line keeps the results: it reports them per record (array shape, or
+#  beats and mean heart rate for qrs) and saves them as <record>_<task>.npy to --out if given. At most
+#  two records per worker are in flight, so the shared memory in use stays bounded for databases of
+#  any size; it is released even if the caller stops consuming the results early.
+#
+#    decode    all leads as int16 array (leads, ticks)
+#    resample  all leads resampled every delta-ms milliseconds, int16 array (leads, ticks)
+#    export    every lead resampled and written to --out by ecg.exporter (no array result)
+#    qrs       R-peak ticks of the first lead (ecg.qrs), int64 array
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from ecg.exporter import FORMATS, export_lead
+from ecg.qrs import REFRACTORY, detect_r_peaks, heart_rate
+from ecg.store import EcgStore, load_record
+
+TASKS = ('decode', 'resample', 'export', 'qrs')
+
+
+class RecordResult:
+    def __init__(self, name, task, n_samples=0, seconds=0.0, array=None, error=None):
+        self.name = name
+        self.task = task
+        self.n_samples = n_samples      # input samples processed (ticks x leads)
+        self.seconds = seconds          # time spent in the worker
+        self.array = array              # result array (only with keep=True)
+        self.error = error
+
+    @property
+    def throughput(self):
+        return self.n_samples / self.seconds if self.seconds > 0 else 0.0
+
+
+def record_ticks(header):
+    if header.n_samples:
+        return header.n_samples
+    # no length in the header: derive it from the size of the (first) signal file
+    signal = header.signals[0]
+    n_file = sum(1 for s in header.signals if s.filename == signal.filename)
+    size = os.path.getsize(os.path.join(header.directory, signal.filename)) - signal.byte_offset
+    bytes_per_sample = 1.5 if signal.format == 212 else 2
+    return int(size / bytes_per_sample) // n_file
+
+
+def output_spec(task, header, delta_ms):
+    # shape and dtype of the array a worker writes for this record, None for tasks without array
+    ticks = record_ticks(header)
+    if task == 'decode':
+        return (header.n_signals, ticks), np.int16
+    if task == 'resample':
+        return (header.n_signals, int(ticks * 1000 / header.frequency // delta_ms)), np.int16
+    if task == 'qrs':
+        return (ticks // max(1, int(REFRACTORY * header.frequency)) + 1,), np.int64
+    return None
+
+
+def _process_record(task, header, shm_name, shape, dtype, delta_ms, fmt, out_dir):
+    # runs in the worker process, returns (result length, input samples, seconds)
+    start = time.perf_counter()
+    record = load_record(header)
+    length = 0
+
+    shm = SharedMemory(name=shm_name) if shm_name else None
+    try:
+        if shm is not None:
+            out = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        else:
+            # result not kept by the caller: same work, into a local array
+            out = np.empty(shape, dtype=dtype) if shape is not None else None
+        if task == 'decode':
+            length = min(shape[1], len(record))
+            out[:, :length] = record.samples[:, :length]
+        elif task == 'resample':
+            t_ms = np.arange(shape[1]) * delta_ms
+            for lead in range(shape[0]):
+                out[lead] = record.get_samples(lead, t_ms)
+            length = shape[1]
+        elif task == 'qrs':
+            peaks = detect_r_peaks(record.lead(0), record.frequency)
+            length = min(len(peaks), shape[0])
+            out[:length] = peaks[:length]
+        elif task == 'export':
+            for lead, name in enumerate(header.lead_names):
+                filename = os.path.join(out_dir, f"{header.name}_{name.replace(' ', '_')}.{fmt}")
+                length = export_lead(record, filename, lead, delta_millis=delta_ms, fmt=fmt)
+        del out     # the buffer can only be closed once no array refers to it
+    finally:
+        if shm is not None:
+            shm.close()
+    return length, record.samples.size, time.perf_counter() - start
+
+
+def run_batch(headers, task, workers=None, delta_ms=20, fmt='raw', out_dir=None, keep=False):
+    # generator yielding one RecordResult per record in order of completion
+    if task not in TASKS:
+        raise ValueError(f"unknown task '{task}', use one of {', '.join(TASKS)}")
+    if task == 'export' and not out_dir:
+        raise ValueError("the export task needs an output directory")
+    workers = workers or os.cpu_count() or 1
+    queue = list(headers)
+    running = dict()    # future -> (header, shared memory, shape, dtype)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            while queue or running:
+                while queue and len(running) < 2 * workers:
+                    header = queue.pop(0)
+                    spec = output_spec(task, header, delta_ms)
+                    shape, dtype = spec if spec is not None else (None, None)
+                    shm = None
+                    if spec is not None and keep:
+                        shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+                    future = pool.submit(_process_record, task, header, shm.name if shm else None, shape, dtype,
+                                         delta_ms, fmt, out_dir)
+                    running[future] = (header, shm, shape, dtype)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    header, shm, shape, dtype = running.pop(future)
+                    result = RecordResult(header.name, task)
+                    try:
+                        length, result.n_samples, result.seconds = future.result()
+                        if shm is not None:
+                            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                            result.array = (array[..., :length] if task != 'qrs' else array[:length]).copy()
+                            del array
+                    except Exception as e:
+                        result.error = e
+                    finally:
+                        if shm is not None:
+                            shm.close()
+                            shm.unlink()
+                    yield result
+        finally:
+            # the consumer stopped early (break, exception) or all is done: nothing may stay in /dev/shm.
+            # Records already being processed are waited for, so no worker attaches to a block after
+            # it has been unlinked.
+            for future in running:
+                future.cancel()
+            wait(running)
+            for _, shm, _, _ in running.values():
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            running.clear()
+
+
+def describe(result, header):
+    # short text of a kept result for the command line
+    if result.task == 'qrs':
+        _, bpm = heart_rate(result.array, header.frequency)
+        rate = f", {bpm.mean():5.1f} bpm mean" if len(bpm) else ""
+        return f"{len(result.array)} beats{rate}"
+    if result.array is not None:
+        return "x".join(str(n) for n in result.array.shape) + " samples"
+    return f"{len(header.lead_names)} leads exported"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process all records of an ECG database directory in parallel")
+    parser.add_argument("directory", help="directory with .hea/.dat records")
+    parser.add_argument("--task", choices=TASKS, default='decode')
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--delta-ms", type=float, default=20, help="resampling interval for resample/export")
+    parser.add_argument("--format", choices=FORMATS, default='raw', help="export format")
+    parser.add_argument("--out", default=None, help="output directory for export, or for the .npy results of the other tasks")
+    args = parser.parse_args(argv)
+
+    store = EcgStore(args.directory)
+    headers = [store.header(name) for name in store.record_names()]
+    by_name = {header.name: header for header in headers}
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    total = 0
+    failed = 0
+    for result in run_batch(headers, args.task, args.workers, args.delta_ms, args.format, args.out,
+                            keep=args.task != 'export'):
+        if result.error is not None:
+            failed += 1
+            print(f"{result.name:>10}: failed ({result.error})")
+            continue
+        total += result.n_samples
+        if args.out and result.array is not None:
+            np.save(os.path.join(args.out, f"{result.name}_{args.task}.npy"), result.array)
+        print(f"{result.name:>10}: {describe(result, by_name[result.name])}, "
+              f"{result.seconds * 1000:8.1f} ms, {result.throughput / 1e6:7.2f} M samples/s")
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(headers)} records, {failed} failed, {elapsed:.2f} s, {total / elapsed / 1e6:.2f} M samples/s in total")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
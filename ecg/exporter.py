@@ -0,0 +1,122 @@
+# Streaming export of resampled ECG leads
+#
+#  The requested range is resampled chunk by chunk with EcgSim.get_samples and every chunk is written
+#  with a single buffered write, so full-length records can be exported at any delta_millis with
+#  bounded memory. Supported formats:
+#
+#    raw     int16 little-endian samples, no header
+#    base64  the raw format as one continuous base64 stream (padding only at the very end)
+#    legacy  every sample as 2 big-endian bytes, base64 encoded separately ("A+M=A+M=..."),
+#            the format originally written by export_data (see data/export.bytes)
+#    csv     "t_ms,value" lines
+#    npy     NumPy .npy file with an int16 array
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import base64
+
+import numpy as np
+
+FORMATS = ('raw', 'base64', 'legacy', 'csv', 'npy')
+CHUNK_TICKS = 1 << 18   # timestamps resampled and written per chunk
+WRITE_BUFFER = 1 << 20
+
+_B64_ALPHABET = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/', dtype=np.uint8)
+_B64_DECODE = np.full(256, 255, dtype=np.uint8)
+_B64_DECODE[_B64_ALPHABET] = np.arange(64, dtype=np.uint8)
+
+
+def encode_legacy(values):
+    # vectorized version of base64.b64encode(value.to_bytes(2)) for every single value
+    v = np.asarray(values).astype(np.int16).view(np.uint16).astype(np.uint32)
+    chars = np.empty((len(v), 4), dtype=np.uint8)
+    chars[:, 0] = _B64_ALPHABET[v >> 10]
+    chars[:, 1] = _B64_ALPHABET[(v >> 4) & 0x3F]
+    chars[:, 2] = _B64_ALPHABET[(v & 0x0F) << 2]
+    chars[:, 3] = ord('=')
+    return chars.tobytes()
+
+
+def decode_legacy(data):
+    # inverse of encode_legacy, returns int16 values
+    chars = np.frombuffer(data, dtype=np.uint8)
+    chars = chars[:len(chars) // 4 * 4].reshape(-1, 4)
+    bits = _B64_DECODE[chars[:, :3]].astype(np.uint16)
+    if np.any(bits == 255) or np.any(chars[:, 3] != ord('=')):
+        raise ValueError("data is not in the legacy per-sample base64 format")
+    return ((bits[:, 0] << 10) | (bits[:, 1] << 4) | (bits[:, 2] >> 2)).view(np.int16)
+
+
+class _Base64Writer:
+    # encodes a byte stream as one continuous base64 text, keeping incomplete 3-byte groups for the next write
+    def __init__(self, f):
+        self.f = f
+        self.rest = b''
+
+    def write(self, data):
+        data = self.rest + data
+        cut = len(data) // 3 * 3
+        self.f.write(base64.b64encode(data[:cut]))
+        self.rest = data[cut:]
+
+    def close(self):
+        self.f.write(base64.b64encode(self.rest))
+        self.rest = b''
+
+
+def export_lead(sim, filename, lead='MLII', total_ticks=None, delta_millis=20, fmt='raw', chunk_ticks=CHUNK_TICKS):
+    # total_ticks=None exports the whole record at the given delta_millis
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format '{fmt}', use one of {', '.join(FORMATS)}")
+    if delta_millis <= 0:
+        raise ValueError("delta_millis has to be positive")
+    if total_ticks is None:
+        total_ticks = int(sim.duration_ms() // delta_millis)
+
+    if fmt == 'npy':
+        # open_memmap writes the header and lets us fill the array chunk by chunk
+        out = np.lib.format.open_memmap(filename, mode='w+', dtype='<i2', shape=(total_ticks,))
+        for start in range(0, total_ticks, chunk_ticks):
+            stop = min(start + chunk_ticks, total_ticks)
+            out[start:stop] = sim.get_samples(lead, np.arange(start, stop) * delta_millis)
+        out.flush()
+        del out
+        return total_ticks
+
+    with open(filename, "wb", buffering=WRITE_BUFFER) as f:
+        writer = _Base64Writer(f) if fmt == 'base64' else f
+        for start in range(0, total_ticks, chunk_ticks):
+            t_ms = np.arange(start, min(start + chunk_ticks, total_ticks)) * delta_millis
+            values = sim.get_samples(lead, t_ms)
+            if fmt == 'legacy':
+                writer.write(encode_legacy(values))
+            elif fmt == 'csv':
+                lines = map('{},{}\n'.format, t_ms.tolist(), values.tolist())
+                writer.write(''.join(lines).encode('ascii'))
+            else:
+                writer.write(values.astype('<i2').tobytes())
+        if fmt == 'base64':
+            writer.close()
+    return total_ticks
+
+
+def read_export(filename, fmt='raw'):
+    # reads an exported lead back into an int16 array (csv: the value column)
+    if fmt == 'npy':
+        return np.load(filename, mmap_mode='r')
+    if fmt == 'raw':
+        return np.fromfile(filename, dtype='<i2')
+    if fmt == 'csv':
+        return np.loadtxt(filename, delimiter=',', dtype=np.float64, ndmin=2)[:, 1].astype(np.int16)
+
+    with open(filename, "rb") as f:
+        data = f.read()
+    if fmt == 'base64':
+        return np.frombuffer(base64.b64decode(data), dtype='<i2')
+    if fmt == 'legacy':
+        return decode_legacy(data)
+    raise ValueError(f"unknown export format '{fmt}', use one of {', '.join(FORMATS)}")
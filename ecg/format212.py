@@ -0,0 +1,79 @@
+# Decoder for the MIT-BIH / WFDB signal format 212
+#
+#  Format 212 packs two 12-bit two's complement samples into three bytes:
+#
+#    byte 0: low 8 bits of sample 0
+#    byte 1: low nibble = high 4 bits of sample 0, high nibble = high 4 bits of sample 1
+#    byte 2: low 8 bits of sample 1
+#
+#  Samples of all signals are interleaved (s0 of lead 0, s0 of lead 1, s1 of lead 0, ...),
+#  so for the two-lead MIT-BIH records every 3-byte group holds exactly one frame.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import numpy as np
+
+
+def decode_212(raw):
+    # decode a buffer of format 212 bytes into a flat int16 array of samples
+    raw = np.frombuffer(raw, dtype=np.uint8) if not isinstance(raw, np.ndarray) else raw
+    n_groups = len(raw) // 3
+    groups = raw[:n_groups * 3].reshape(-1, 3)
+
+    samples = np.empty((n_groups, 2), dtype=np.int16)
+    mid = groups[:, 1].astype(np.int16)
+    samples[:, 0] = groups[:, 0] | ((mid & 0x0F) << 8)
+    samples[:, 1] = groups[:, 2] | ((mid & 0xF0) << 4)
+
+    # sign extension of the 12-bit two's complement values
+    samples ^= 0x800
+    samples -= 0x800
+    return samples.reshape(-1)
+
+
+class Format212Record:
+    # memory-mapped access to a format 212 file, decoding only the frames requested
+    def __init__(self, filename, n_signals=2, byte_offset=0):
+        self.filename = filename
+        self.n_signals = n_signals
+        self.raw = np.memmap(filename, dtype=np.uint8, mode='r', offset=byte_offset)
+        # every sample needs 1.5 bytes, incomplete trailing frames are dropped
+        self.n_frames = (len(self.raw) * 2 // 3) // n_signals
+
+    def __len__(self):
+        return self.n_frames
+
+    def read(self, start=0, stop=None):
+        # returns an int16 array of shape (frames, n_signals) for frames [start, stop)
+        if stop is None or stop > self.n_frames:
+            stop = self.n_frames
+        start = max(0, min(start, stop))
+
+        first_sample = start * self.n_signals
+        last_sample = stop * self.n_signals
+        # decoding has to start at an even sample, i.e. at the beginning of a 3-byte group
+        skip = first_sample % 2
+        first_group = (first_sample - skip) // 2
+        last_group = (last_sample + 1) // 2
+
+        flat = decode_212(self.raw[first_group * 3:last_group * 3])
+        flat = flat[skip:skip + last_sample - first_sample]
+        return flat.reshape(-1, self.n_signals)
+
+
+def encode_212(samples):
+    # inverse of decode_212: packs an int array of shape (frames, signals) into format 212 bytes
+    flat = np.asarray(samples, dtype=np.int16).reshape(-1)
+    if len(flat) % 2:
+        flat = np.append(flat, np.int16(0))
+    values = (flat.astype(np.uint16) & 0x0FFF).reshape(-1, 2)
+
+    raw = np.empty((len(values), 3), dtype=np.uint8)
+    raw[:, 0] = values[:, 0] & 0xFF
+    raw[:, 1] = ((values[:, 0] >> 8) & 0x0F) | ((values[:, 1] >> 4) & 0xF0)
+    raw[:, 2] = values[:, 1] & 0xFF
+    return raw.tobytes()
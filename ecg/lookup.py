@@ -0,0 +1,43 @@
+# Time based sample lookup shared by EcgSim and EcgRecord
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import numpy as np
+
+
+def lookup_samples(column, frequency, t_ms, interpolate=False, wrap=True):
+    # returns the samples of one lead for an array of timestamps [in ms]
+    #   wrap=True:  timestamps past the end of the record start over at the beginning (t mod duration)
+    #   wrap=False: timestamps outside the record raise an IndexError
+    #   interpolate=True: linear interpolation between the two neighbouring ticks (float32 result)
+    n = len(column)
+    if n == 0:
+        raise ValueError("no ECG data loaded")
+
+    # tick position is: t [in ms] * frequency/1000
+    ticks = np.asarray(t_ms, dtype=np.float64) * (frequency / 1000)
+    if wrap:
+        ticks = np.mod(ticks, n)
+    else:
+        outside = (ticks < 0) | (ticks > n - 1)
+        if np.any(outside):
+            first = np.asarray(t_ms).reshape(-1)[np.argmax(outside.reshape(-1))]
+            raise IndexError(f"{np.count_nonzero(outside)} timestamp(s) outside of the record "
+                             f"(0 - {(n - 1) * 1000 / frequency:.1f} ms), e.g. t={first} ms")
+
+    idx = ticks.astype(np.intp)
+    if wrap:
+        idx %= n    # guards against rounding of the float modulo up to n
+    if not interpolate:
+        return column[idx]
+
+    frac = (ticks - idx).astype(np.float32)
+    idx_next = idx + 1
+    idx_next[idx_next >= n] = 0 if wrap else n - 1
+    values = column[idx].astype(np.float32)
+    values += frac * (column[idx_next] - values)
+    return values
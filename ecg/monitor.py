@@ -0,0 +1,143 @@
+# Real-time "sweep" monitor for the ECG simulator
+#
+#  Like a bedside monitor the trace is written from left to right into a fixed-size ring buffer and
+#  a short blank gap runs ahead of the write cursor. The lines are updated with matplotlib blitting,
+#  the x data never changes and the y data is the ring buffer itself, so neither memory nor CPU grow
+#  over a long session. Playback follows the wall clock: every frame advances by the ticks that are
+#  due since the start, independent of the achieved frame rate.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import time
+
+import numpy as np
+
+
+class SweepBuffer:
+    def __init__(self, n_leads, size, gap=None):
+        self.size = size
+        self.gap = gap if gap is not None else max(1, size // 50)
+        self.data = np.full((n_leads, size), np.nan, dtype=np.float32)
+        self.cursor = 0
+
+    def push(self, chunk):
+        # chunk: array of shape (n_leads, ticks), written at the cursor with wrap-around
+        ticks = chunk.shape[1]
+        if ticks >= self.size:
+            chunk = chunk[:, -self.size:]
+            ticks = self.size
+        idx = (self.cursor + np.arange(ticks)) % self.size
+        self.data[:, idx] = chunk
+        self.cursor = (self.cursor + ticks) % self.size
+        # blank the gap in front of the cursor
+        gap = (self.cursor + np.arange(self.gap)) % self.size
+        self.data[:, gap] = np.nan
+
+
+class FrameStats:
+    # frame-time instrumentation: keeps the last frame intervals in a fixed-size array
+    def __init__(self, fps, history=600):
+        self.target = 1.0 / fps
+        self.intervals = np.zeros(history)
+        self.render_times = np.zeros(history)
+        self.count = 0
+        self.dropped = 0
+        self.last = None
+
+    def frame(self, render_time):
+        now = time.perf_counter()
+        if self.last is not None:
+            interval = now - self.last
+            # every full frame period that passed without a frame counts as dropped
+            self.dropped += max(0, int(interval / self.target + 0.5) - 1)
+            self.intervals[self.count % len(self.intervals)] = interval
+            self.render_times[self.count % len(self.render_times)] = render_time
+            self.count += 1
+        self.last = now
+
+    def summary(self):
+        n = min(self.count, len(self.intervals))
+        if n == 0:
+            return "no frames yet"
+        intervals = self.intervals[:n] * 1000
+        render = self.render_times[:n] * 1000
+        return (f"frames {self.count}, dropped {self.dropped}, "
+                f"interval avg {intervals.mean():.1f} ms / p99 {np.percentile(intervals, 99):.1f} ms, "
+                f"render avg {render.mean():.2f} ms / max {render.max():.2f} ms")
+
+
+class SweepMonitor:
+    def __init__(self, sim, leads=('MLII', 'V1'), window_seconds=5, fps=30, speed=1.0, report_seconds=10):
+        import matplotlib.pyplot as plt
+
+        self.frequency = sim.frequency
+        self.samples = [sim.lead_samples(lead) for lead in leads]
+        self.n = len(self.samples[0])
+        self.fps = fps
+        self.speed = speed
+        self.report_seconds = report_seconds
+        self.buffer = SweepBuffer(len(leads), int(window_seconds * sim.frequency))
+        self.stats = FrameStats(fps)
+
+        self.played = 0     # ticks pushed so far
+        self.start_time = None
+        self.last_report = None
+        self.animation = None
+
+        self.fig, axes = plt.subplots(len(leads), 1, figsize=(12, 3 * len(leads)), sharex=True, squeeze=False)
+        if self.fig.canvas.manager is not None:
+            self.fig.canvas.manager.set_window_title("ECG monitor")
+        x = np.arange(self.buffer.size) / sim.frequency
+        self.lines = []
+        for i, (ax, lead, samples) in enumerate(zip(axes[:, 0], leads, self.samples)):
+            line, = ax.plot(x, self.buffer.data[i], 'g-', linewidth=1.0, animated=True)
+            ax.set_xlim(0, window_seconds)
+            low, high = np.percentile(samples, [0.1, 99.9])
+            ax.set_ylim(low - 0.1 * (high - low), high + 0.1 * (high - low))
+            ax.set_ylabel(lead)
+            self.lines.append(line)
+        axes[-1, 0].set_xlabel("t [in seconds]")
+
+    def advance(self):
+        # push all ticks that are due by now
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        due = int((now - self.start_time) * self.frequency * self.speed)
+        ticks = due - self.played
+        if ticks <= 0:
+            return
+        if ticks > self.buffer.size:
+            # after a long stall only the last window is visible anyway
+            self.played += ticks - self.buffer.size
+            ticks = self.buffer.size
+        idx = (self.played + np.arange(ticks)) % self.n
+        self.buffer.push(np.stack([samples[idx] for samples in self.samples]))
+        self.played += ticks
+
+    def update(self, frame=None):
+        start = time.perf_counter()
+        self.advance()
+        for i, line in enumerate(self.lines):
+            line.set_ydata(self.buffer.data[i])
+        self.stats.frame(time.perf_counter() - start)
+
+        if self.report_seconds and (self.last_report is None or start - self.last_report > self.report_seconds):
+            if self.last_report is not None:
+                print(self.stats.summary())
+            self.last_report = start
+        return self.lines
+
+    def run(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+
+        # cache_frame_data=False: an endless animation must not keep its frames
+        self.animation = FuncAnimation(self.fig, self.update, interval=1000 / self.fps, blit=True,
+                                       cache_frame_data=False)
+        plt.show()
+        print(self.stats.summary())
@@ -0,0 +1,116 @@
+# Level-of-detail plotting of full-length ECG records with matplotlib
+#
+#  A min/max pyramid is built once per lead: level k summarizes FACTOR^k ticks per bucket by their
+#  minimum and maximum. For a visible range only the finest level with at most about one bucket per
+#  screen pixel is drawn (as an envelope alternating min and max), so the number of plotted points
+#  depends on the figure width, not on the record length. Panning and zooming re-query the pyramid.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import numpy as np
+
+FACTOR = 4
+
+
+class MinMaxPyramid:
+    def __init__(self, samples, factor=FACTOR, min_buckets=512):
+        self.factor = factor
+        self.n = len(samples)
+        self.mins = [np.asarray(samples)]
+        self.maxs = [self.mins[0]]
+
+        while len(self.mins[-1]) > min_buckets:
+            self.mins.append(self._reduce(self.mins[-1], np.minimum))
+            self.maxs.append(self._reduce(self.maxs[-1], np.maximum))
+
+    def _reduce(self, values, ufunc):
+        # combine groups of factor values, the last incomplete group is padded with its own last value
+        pad = (-len(values)) % self.factor
+        if pad:
+            values = np.concatenate([values, np.repeat(values[-1:], pad)])
+        return ufunc.reduce(values.reshape(-1, self.factor), axis=1)
+
+    @property
+    def levels(self):
+        return len(self.mins)
+
+    def bucket_size(self, level):
+        return self.factor ** level
+
+    def choose_level(self, t0, t1, max_points):
+        # finest level that shows [t0, t1) with at most max_points buckets
+        span = max(t1 - t0, 1)
+        for level in range(self.levels):
+            if span / self.bucket_size(level) <= max_points:
+                return level
+        return self.levels - 1
+
+    def query(self, t0, t1, max_points):
+        # returns (ticks, values) for ticks [t0, t1); on decimated levels min and max of a bucket alternate
+        t0 = int(max(0, t0))
+        t1 = int(min(self.n, t1))
+        level = self.choose_level(t0, t1, max_points)
+        size = self.bucket_size(level)
+        last = min(len(self.mins[level]), -(-t1 // size))
+        first = min(t0 // size, last)
+
+        if level == 0:
+            return np.arange(first, last), self.mins[0][first:last]
+
+        ticks = np.repeat(np.arange(first, last) * size + size / 2, 2)
+        values = np.empty(2 * (last - first), dtype=self.mins[level].dtype)
+        values[0::2] = self.mins[level][first:last]
+        values[1::2] = self.maxs[level][first:last]
+        return ticks, values
+
+
+class LodPlot:
+    # draws leads of an EcgSim on a matplotlib axes and updates the level of detail on pan/zoom
+    def __init__(self, ax, sim, leads=('MLII',), styles=('r-', 'b-'), max_points=None):
+        self.ax = ax
+        self.frequency = sim.frequency
+        self.max_points = max_points
+        self.pyramids = []
+        self.lines = []
+        self.updating = False
+
+        for lead, style in zip(leads, styles):
+            self.pyramids.append(MinMaxPyramid(sim.lead_samples(lead)))
+            line, = ax.plot([], [], style, linewidth=1.0, label=lead)
+            self.lines.append(line)
+
+        duration = self.pyramids[0].n / self.frequency if self.pyramids else 1
+        ax.set_xlim(0, duration)
+        lows = [pyramid.mins[-1].min() for pyramid in self.pyramids]
+        highs = [pyramid.maxs[-1].max() for pyramid in self.pyramids]
+        if lows:
+            margin = 0.05 * max(1, max(highs) - min(lows))
+            ax.set_ylim(min(lows) - margin, max(highs) + margin)
+
+        self.update()
+        ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    def points_for_width(self):
+        if self.max_points is not None:
+            return self.max_points
+        # about two buckets per pixel keeps the envelope visually identical to the full data
+        return 2 * max(100, int(self.ax.get_window_extent().width))
+
+    def update(self):
+        t0, t1 = self.ax.get_xlim()
+        max_points = self.points_for_width()
+        for pyramid, line in zip(self.pyramids, self.lines):
+            ticks, values = pyramid.query(t0 * self.frequency, t1 * self.frequency + 1, max_points)
+            line.set_data(ticks / self.frequency, values)
+
+    def on_xlim_changed(self, ax):
+        if not self.updating:
+            self.updating = True
+            try:
+                self.update()
+            finally:
+                self.updating = False
@@ -0,0 +1,188 @@
+# QRS / R-peak detection after Pan and Tompkins
+#
+#  Pan J, Tompkins WJ. A Real-Time QRS Detection Algorithm. IEEE Trans Biomed Eng 32(3):230-236 (1985)
+#
+#  Pipeline: band-pass (5-15 Hz) -> derivative -> squaring -> moving-window integration (150 ms)
+#  -> local maxima as candidates -> adaptive thresholds with search-back for missed beats.
+#
+#  All filters are FIR filters, evaluated with np.convolve per chunk. The detector carries the filter
+#  tails from one chunk to the next, so the streaming mode (process() per chunk) gives exactly the same
+#  peaks as the batch mode (detect_r_peaks on the whole record). Only the threshold logic runs as a
+#  Python loop, and only over the candidate peaks (a few per second), not over the samples.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import numpy as np
+
+BAND = (5.0, 15.0)          # Hz
+INTEGRATION_WINDOW = 0.150  # s
+REFRACTORY = 0.200          # s
+LEARNING_PHASE = 2.0        # s
+SEARCH_BACK_RR = 1.66       # search for missed beats if no beat was found for 1.66 x average RR
+
+
+def bandpass_kernel(frequency, band=BAND):
+    # windowed-sinc band-pass with about 200 ms length
+    n_taps = int(0.2 * frequency) | 1
+    t = np.arange(n_taps) - (n_taps - 1) / 2
+    low, high = band[0] / frequency, band[1] / frequency
+    kernel = 2 * high * np.sinc(2 * high * t) - 2 * low * np.sinc(2 * low * t)
+    return kernel * np.hamming(n_taps)
+
+
+class QrsDetector:
+    def __init__(self, frequency):
+        self.frequency = frequency
+        self.bp_kernel = bandpass_kernel(frequency)
+        # five point derivative of Pan-Tompkins, scaled to the sampling frequency
+        self.diff_kernel = np.convolve(self.bp_kernel, np.array([1, 2, 0, -2, -1]) * frequency / 8)
+        self.window = max(1, int(INTEGRATION_WINDOW * frequency))
+        self.bp_delay = (len(self.bp_kernel) - 1) // 2
+        self.refractory = int(REFRACTORY * frequency)
+
+        # streaming state
+        self.n_in = 0               # samples consumed so far
+        self.x_tail = None          # last input samples needed by the FIR filters
+        self.sq_tail = np.zeros(self.window - 1)
+        self.bp_hist = np.zeros(self.window + 3)   # band-passed signal of the last samples, to locate R
+        self.mwi_last = np.array([-np.inf, -np.inf])
+
+        # threshold state
+        self.learning = []          # mwi values of the learning phase
+        self.pending = []           # candidates seen during the learning phase
+        self.spki = 0.0
+        self.npki = 0.0
+        self.last_r = None
+        self.rr = []                # last 8 RR intervals in samples
+        self.skipped = []           # noise candidates since the last R peak, for search-back
+
+    @property
+    def threshold1(self):
+        return self.npki + 0.25 * (self.spki - self.npki)
+
+    def rr_average(self):
+        return sum(self.rr) / len(self.rr) if self.rr else self.frequency
+
+    def process(self, chunk):
+        # consumes the next samples of the record, returns the R-peak indices found (absolute sample index)
+        x = np.asarray(chunk, dtype=np.float64)
+        if len(x) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if self.x_tail is None:
+            # pretend the signal was constant before the start, avoids a huge step response
+            self.x_tail = np.full(len(self.diff_kernel) - 1, x[0])
+        start = self.n_in
+        self.n_in += len(x)
+
+        ext = np.concatenate([self.x_tail, x])
+        self.x_tail = ext[len(ext) - (len(self.diff_kernel) - 1):]
+        bp = np.convolve(ext[len(self.diff_kernel) - len(self.bp_kernel):], self.bp_kernel, 'valid')
+        sq = np.convolve(ext, self.diff_kernel, 'valid') ** 2
+
+        sq_ext = np.concatenate([self.sq_tail, sq])
+        self.sq_tail = sq_ext[len(sq_ext) - (self.window - 1):] if self.window > 1 else self.sq_tail
+        mwi = np.convolve(sq_ext, np.full(self.window, 1.0 / self.window), 'valid')
+
+        # keep the band-passed signal of the current chunk plus one integration window before it
+        span = self.window + 3
+        bp_ext = np.concatenate([self.bp_hist, bp])
+        bp_offset = start - span
+        self.bp_hist = bp_ext[-span:]
+
+        # candidates are local maxima of the integrated signal, the last sample waits for the next chunk
+        m = np.concatenate([self.mwi_last, mwi])
+        self.mwi_last = m[-2:]
+        idx = np.flatnonzero((m[1:-1] > m[:-2]) & (m[1:-1] >= m[2:]))
+        positions = start - 1 + idx     # absolute index of the mwi value m[idx + 1]
+        values = m[idx + 1]
+
+        # the QRS complex lies within the integration window before the mwi maximum: R is the largest
+        # band-passed amplitude in the span samples up to the candidate (one gather for all candidates)
+        windows = np.lib.stride_tricks.sliding_window_view(np.abs(bp_ext), span)
+        first = positions - bp_offset - span + 1    # index of the window ending at the candidate
+        r_peaks = np.maximum(bp_offset + first + windows[first].argmax(axis=1) - self.bp_delay, 0)
+        candidates = list(zip(positions.tolist(), r_peaks.tolist(), values.tolist()))
+
+        if self.learning is not None:
+            self.learning.append(mwi)
+            self.pending.extend(candidates)
+            if self.n_in < LEARNING_PHASE * self.frequency:
+                return np.zeros(0, dtype=np.int64)
+            candidates = self.finish_learning()
+        return np.array(self.classify(candidates), dtype=np.int64)
+
+    def finish_learning(self):
+        values = np.concatenate(self.learning) if self.learning else np.zeros(1)
+        self.spki = 0.25 * values.max()
+        self.npki = 0.5 * values.mean()
+        self.learning = None
+        candidates, self.pending = self.pending, []
+        return candidates
+
+    def flush(self):
+        # end of record: a record shorter than the learning phase still gets classified
+        if self.learning is not None:
+            return np.array(self.classify(self.finish_learning()), dtype=np.int64)
+        return np.zeros(0, dtype=np.int64)
+
+    def accept(self, r, value, weight):
+        self.spki = weight * value + (1 - weight) * self.spki
+        if self.last_r is not None:
+            self.rr.append(r - self.last_r)
+            del self.rr[:-8]
+        self.last_r = r
+        self.skipped = []
+
+    def classify(self, candidates):
+        peaks = []
+        for pos, r, value in candidates:
+            if self.last_r is not None and r - self.last_r < self.refractory:
+                continue
+            if self.last_r is not None and self.skipped and r - self.last_r > SEARCH_BACK_RR * self.rr_average():
+                # search-back: take the strongest skipped candidate above the lower threshold
+                _, best_r, best_value = max(self.skipped, key=lambda c: c[2])
+                if best_value > 0.5 * self.threshold1 and r - best_r >= self.refractory:
+                    self.accept(best_r, best_value, 0.25)
+                    peaks.append(best_r)
+
+            if value > self.threshold1:
+                self.accept(r, value, 0.125)
+                peaks.append(r)
+            else:
+                self.npki = 0.125 * value + 0.875 * self.npki
+                self.skipped.append((pos, r, value))
+        return peaks
+
+
+def detect_r_peaks(samples, frequency):
+    # batch mode over a whole record
+    detector = QrsDetector(frequency)
+    peaks = detector.process(samples)
+    return np.concatenate([peaks, detector.flush()])
+
+
+def heart_rate(r_peaks, frequency):
+    # returns RR intervals [in ms] and the instantaneous heart rate [in beats per minute]
+    rr_ms = np.diff(np.asarray(r_peaks)) * 1000 / frequency
+    with np.errstate(divide='ignore'):
+        bpm = 60000 / rr_ms
+    return rr_ms, bpm
+
+
+async def detect_from_stream(client, frequency, chunks):
+    # streaming mode on a subscription of the ECG server (see ecg/server.py), returns the R peaks found
+    # in the given number of pushed chunks; tick numbers are taken from the first chunk
+    detector = QrsDetector(frequency)
+    peaks = []
+    first_tick = None
+    for _ in range(chunks):
+        tick, samples = await client.read_chunk()
+        if first_tick is None:
+            first_tick = tick
+        peaks.append(detector.process(samples))
+    peaks.append(detector.flush())
+    return np.concatenate(peaks) + (first_tick or 0)
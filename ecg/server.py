@@ -0,0 +1,331 @@
+# asyncio ECG streaming server
+#
+#  Every connection starts in the legacy mode of ecg_by_data.start_server:
+#    request:  4 bytes, unsigned little-endian time in ms
+#    response: 2 bytes, signed little-endian MLII sample at that time
+#
+#  A client switches its connection to the framed mode by sending the 4 magic bytes FRAMED_MAGIC
+#  (as a legacy timestamp this would be ~49 days, far past any record). In framed mode every message
+#  starts with one type byte:
+#
+#    MSG_BATCH request:  <B type> <I start_ms> <I count> <f stride_ms> <B n_leads> <n_leads x B lead index>
+#              response: <B status> <I count> <B n_leads> <count x n_leads x h samples, row major>
+#
+#    MSG_SUBSCRIBE request:  <B type> <I t0_ms> <f speed> <B lead> <H chunk_size>
+#                  response: <B status> <I 0> <B 1>, followed by pushed chunks until unsubscribed
+#    MSG_UNSUBSCRIBE request:  <B type>
+#                    response: <B status> <I 0> <B 0>
+#
+#    pushed chunk: <B PUSH_CHUNK> <I first_tick> <H count> <count x h samples>
+#
+#  A subscription streams one lead at speed x its sampling frequency, one chunk every
+#  chunk_size / (frequency * speed) seconds. Small chunks mean low latency, large chunks fewer syscalls.
+#  Chunks are timed against absolute deadlines of the monotonic clock, so the rate does not drift. If
+#  a subscriber does not read fast enough, chunks are dropped for it (visible as a gap in first_tick)
+#  instead of queueing up, so one slow subscriber never holds back the others.
+#
+#  All values are little-endian. On a bad request the status is non-zero, count and n_leads are 0 and
+#  the connection stays open. A batch may hold at most MAX_BATCH_SAMPLES samples (count x n_leads),
+#  each lead index only once.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import asyncio
+import struct
+
+import numpy as np
+
+FRAMED_MAGIC = b'ECG\xff'
+
+MSG_BATCH = 1
+MSG_SUBSCRIBE = 2
+MSG_UNSUBSCRIBE = 3
+
+PUSH_CHUNK = 0x80       # first byte of pushed chunks, distinct from all status values
+
+STATUS_OK = 0
+STATUS_BAD_REQUEST = 1
+STATUS_UNKNOWN_TYPE = 2
+
+MAX_BATCH_SAMPLES = 1 << 20     # per request over all leads (2 MB), about 48 minutes of one lead at 360 Hz
+
+BATCH_HEADER = struct.Struct('<IIfB')
+RESPONSE_HEADER = struct.Struct('<BIB')
+SUBSCRIBE_HEADER = struct.Struct('<IfBH')
+CHUNK_HEADER = struct.Struct('<BIH')
+MAX_SPEED = 100.0
+WRITE_BUFFER_HIGH = 256 * 1024  # drain() blocks a client while more than this is queued for it
+
+
+class EcgServer:
+    def __init__(self, sim, host="127.0.0.1", port=65432, verbose=True):
+        self.sim = sim
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        self.server = None
+        self.clients = dict()   # writer -> handler task of the connection
+        self.handlers = {MSG_BATCH: self.handle_batch,
+                         MSG_SUBSCRIBE: self.handle_subscribe,
+                         MSG_UNSUBSCRIBE: self.handle_unsubscribe}
+        self.subscriptions = dict()     # writer -> Subscription
+
+    def log(self, text):
+        if self.verbose:
+            print(text)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        # the port may have been chosen by the OS (port=0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.log(f"ECG server listening on {self.host}:{self.port}")
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # closing the transports lets every handler run into its disconnect path
+        tasks = list(self.clients.values())
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle_client(self, reader, writer):
+        addr = writer.get_extra_info('peername')
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        self.clients[writer] = asyncio.current_task()
+        self.log(f"Connected by {addr}")
+        try:
+            await self.serve_legacy(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass    # client went away, possibly in the middle of a request
+        finally:
+            self.stop_subscription(writer)
+            self.clients.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.log(f"Disconnected {addr}")
+
+    async def serve_legacy(self, reader, writer):
+        while True:
+            request = await reader.readexactly(4)
+            if request == FRAMED_MAGIC:
+                await self.serve_framed(reader, writer)
+                return
+            ms = int.from_bytes(request, 'little')
+            writer.write(struct.pack('<h', self.sim.get_MLii(ms)))
+            await writer.drain()
+
+    async def serve_framed(self, reader, writer):
+        while True:
+            msg_type = (await reader.readexactly(1))[0]
+            handler = self.handlers.get(msg_type)
+            if handler is None:
+                # the length of an unknown message is unknown as well, so the stream cannot be resynchronized
+                writer.write(RESPONSE_HEADER.pack(STATUS_UNKNOWN_TYPE, 0, 0))
+                await writer.drain()
+                return
+            await handler(reader, writer)
+
+    async def handle_batch(self, reader, writer):
+        start_ms, count, stride_ms, n_leads = BATCH_HEADER.unpack(await reader.readexactly(BATCH_HEADER.size))
+        leads = list(await reader.readexactly(n_leads))
+
+        try:
+            block = self.read_block(start_ms, count, stride_ms, leads)
+        except (KeyError, ValueError) as e:
+            self.log(f"bad batch request: {e}")
+            writer.write(RESPONSE_HEADER.pack(STATUS_BAD_REQUEST, 0, 0))
+        else:
+            writer.write(RESPONSE_HEADER.pack(STATUS_OK, count, n_leads))
+            writer.write(block.tobytes())
+        await writer.drain()
+
+    async def handle_subscribe(self, reader, writer):
+        t0_ms, speed, lead, chunk_size = SUBSCRIBE_HEADER.unpack(await reader.readexactly(SUBSCRIBE_HEADER.size))
+        self.stop_subscription(writer)
+        try:
+            subscription = Subscription(self.sim, writer, t0_ms, speed, lead, chunk_size)
+        except (KeyError, ValueError) as e:
+            self.log(f"bad subscription: {e}")
+            writer.write(RESPONSE_HEADER.pack(STATUS_BAD_REQUEST, 0, 0))
+        else:
+            writer.write(RESPONSE_HEADER.pack(STATUS_OK, 0, 1))
+            self.subscriptions[writer] = subscription
+            subscription.start()
+        await writer.drain()
+
+    async def handle_unsubscribe(self, reader, writer):
+        self.stop_subscription(writer)
+        writer.write(RESPONSE_HEADER.pack(STATUS_OK, 0, 0))
+        await writer.drain()
+
+    def stop_subscription(self, writer):
+        subscription = self.subscriptions.pop(writer, None)
+        if subscription is not None:
+            subscription.stop()
+
+    def read_block(self, start_ms, count, stride_ms, leads):
+        # returns an int16 little-endian array of shape (count, leads); everything is checked before the
+        # block is allocated, so the size of a response is bounded by MAX_BATCH_SAMPLES
+        if not leads or stride_ms <= 0 or not np.isfinite(stride_ms):
+            raise ValueError("at least one lead and a positive stride are required")
+        if len(set(leads)) != len(leads):
+            raise ValueError("every lead may only be requested once")
+        for lead in leads:
+            self.sim.lead_column(lead)      # KeyError if out of range
+        if count * len(leads) > MAX_BATCH_SAMPLES:
+            raise ValueError(f"{count} x {len(leads)} leads exceeds {MAX_BATCH_SAMPLES} samples")
+        t_ms = start_ms + np.arange(count) * float(stride_ms)
+        block = np.empty((count, len(leads)), dtype='<i2')
+        for i, lead in enumerate(leads):
+            block[:, i] = self.sim.get_samples(lead, t_ms)
+        return block
+
+
+class Subscription:
+    # pushes one lead of the simulator to one client at a fixed rate
+    def __init__(self, sim, writer, t0_ms, speed, lead, chunk_size):
+        if not 0 < speed <= MAX_SPEED:
+            raise ValueError(f"speed has to be in (0, {MAX_SPEED}]")
+        if chunk_size < 1:
+            raise ValueError("chunk size has to be at least 1")
+        # the decoded array of the simulator is used directly, no copy
+        self.samples = sim.lead_samples(lead)
+        if len(self.samples) == 0:
+            raise ValueError("no ECG data loaded")
+        self.writer = writer
+        self.next_tick = int(t0_ms * sim.frequency / 1000) % len(self.samples)
+        self.chunk_size = chunk_size
+        self.interval = chunk_size / (sim.frequency * speed)
+        self.task = None
+        self.chunks_sent = 0
+        self.chunks_dropped = 0
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def next_chunk(self):
+        n = len(self.samples)
+        first = self.next_tick
+        if first + self.chunk_size <= n:
+            chunk = self.samples[first:first + self.chunk_size]
+        else:
+            chunk = self.samples.take(np.arange(first, first + self.chunk_size) % n)
+        self.next_tick = (first + self.chunk_size) % n
+        return first, chunk
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        transport = self.writer.transport
+        deadline = loop.time()
+        try:
+            while not transport.is_closing():
+                first, chunk = self.next_chunk()
+                if transport.get_write_buffer_size() > WRITE_BUFFER_HIGH:
+                    self.chunks_dropped += 1
+                else:
+                    self.writer.write(CHUNK_HEADER.pack(PUSH_CHUNK, first, len(chunk)) + chunk.astype('<i2').tobytes())
+                    self.chunks_sent += 1
+
+                # absolute deadlines: time spent above does not accumulate as drift
+                deadline += self.interval
+                delay = deadline - loop.time()
+                if delay < -self.interval:
+                    deadline = loop.time()  # fell far behind (e.g. a blocked loop), resynchronize
+                await asyncio.sleep(max(delay, 0))
+        except asyncio.CancelledError:
+            pass
+
+
+class EcgClient:
+    # small asyncio client for both protocol modes, used by the load test harness
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.framed = False
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def get_sample(self, ms):
+        self.writer.write(int(ms).to_bytes(4, 'little'))
+        return struct.unpack('<h', await self.reader.readexactly(2))[0]
+
+    async def enable_framed(self):
+        if not self.framed:
+            self.writer.write(FRAMED_MAGIC)
+            self.framed = True
+
+    async def get_batch(self, start_ms, count, stride_ms, leads=(0,)):
+        await self.enable_framed()
+        self.writer.write(bytes([MSG_BATCH]) + BATCH_HEADER.pack(start_ms, count, stride_ms, len(leads)) + bytes(leads))
+        await self.writer.drain()
+        status, count, n_leads = RESPONSE_HEADER.unpack(await self.reader.readexactly(RESPONSE_HEADER.size))
+        if status != STATUS_OK:
+            raise ValueError(f"server rejected the request (status {status})")
+        data = await self.reader.readexactly(count * n_leads * 2)
+        return np.frombuffer(data, dtype='<i2').reshape(count, n_leads)
+
+    async def subscribe(self, t0_ms, speed=1.0, lead=0, chunk_size=36):
+        await self.enable_framed()
+        self.writer.write(bytes([MSG_SUBSCRIBE]) + SUBSCRIBE_HEADER.pack(t0_ms, speed, lead, chunk_size))
+        await self.writer.drain()
+        status, _, _ = RESPONSE_HEADER.unpack(await self.reader.readexactly(RESPONSE_HEADER.size))
+        if status != STATUS_OK:
+            raise ValueError(f"server rejected the subscription (status {status})")
+
+    async def read_chunk(self):
+        # returns (first_tick, samples) of the next pushed chunk
+        kind, first, count = CHUNK_HEADER.unpack(await self.reader.readexactly(CHUNK_HEADER.size))
+        if kind != PUSH_CHUNK:
+            raise ValueError(f"expected a pushed chunk, got message {kind}")
+        return first, np.frombuffer(await self.reader.readexactly(count * 2), dtype='<i2')
+
+    async def unsubscribe(self):
+        self.writer.write(bytes([MSG_UNSUBSCRIBE]))
+        await self.writer.drain()
+        # chunks pushed before the server saw the request are skipped
+        while True:
+            kind = (await self.reader.readexactly(1))[0]
+            if kind != PUSH_CHUNK:
+                await self.reader.readexactly(RESPONSE_HEADER.size - 1)
+                return
+            _, count = struct.unpack('<IH', await self.reader.readexactly(CHUNK_HEADER.size - 1))
+            await self.reader.readexactly(count * 2)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def run_server(sim, host, port):
+    server = EcgServer(sim, host, port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
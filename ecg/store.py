@@ -0,0 +1,154 @@
+# ECG record store for a whole WFDB database directory
+#
+#  Records are discovered by their .hea headers, but the signal data is only decoded when a record is
+#  accessed. Every loaded record is kept as one contiguous int16 array of shape (leads, ticks), so each
+#  lead is a contiguous row. Loaded records are evicted least-recently-used first as soon as the sum of
+#  their sizes exceeds the memory budget.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from ecg.format212 import Format212Record
+from ecg.lookup import lookup_samples
+from ecg.wfdb_header import read_header
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+class EcgRecord:
+    def __init__(self, header, samples):
+        self.header = header
+        self.samples = samples      # int16 array of shape (leads, ticks)
+        self.lead_index = {name: i for i, name in enumerate(header.lead_names)}
+
+    @property
+    def name(self):
+        return self.header.name
+
+    @property
+    def frequency(self):
+        return self.header.frequency
+
+    @property
+    def nbytes(self):
+        return self.samples.nbytes
+
+    def __len__(self):
+        return self.samples.shape[1]
+
+    def lead(self, lead):
+        # lead can be given by its name (e.g. 'MLII') or its position in the header
+        if isinstance(lead, str):
+            if lead not in self.lead_index:
+                raise KeyError(f"record {self.name} has no lead '{lead}'")
+            lead = self.lead_index[lead]
+        return self.samples[lead]
+
+    def duration_ms(self):
+        return len(self) * 1000 / self.frequency
+
+    def get_samples(self, lead, t_ms, interpolate=False, wrap=True):
+        # same as EcgSim.get_samples, so records can be exported and served like the simulator
+        return lookup_samples(self.lead(lead), self.frequency, t_ms, interpolate, wrap)
+
+    def to_physical(self, lead):
+        # converts adc values into physical units (usually mV)
+        idx = self.lead_index[lead] if isinstance(lead, str) else lead
+        signal = self.header.signals[idx]
+        return (self.samples[idx].astype(np.float32) - signal.baseline) / signal.gain
+
+
+def load_record(header):
+    n_ticks = header.n_samples
+    samples = None
+
+    # signals may be spread across several files, each file interleaves its own signals
+    files = OrderedDict()
+    for i, signal in enumerate(header.signals):
+        files.setdefault(signal.filename, []).append(i)
+
+    for filename, indices in files.items():
+        first = header.signals[indices[0]]
+        path = os.path.join(header.directory, filename)
+        if first.format == 212:
+            data = Format212Record(path, n_signals=len(indices), byte_offset=first.byte_offset).read(0, n_ticks)
+        elif first.format == 16:
+            data = np.fromfile(path, dtype='<i2', offset=first.byte_offset)
+            data = data[:len(data) // len(indices) * len(indices)].reshape(-1, len(indices))[:n_ticks]
+        else:
+            raise ValueError(f"signal format {first.format} of record {header.name} is not supported")
+
+        if samples is None:
+            n_ticks = len(data) if n_ticks is None else min(n_ticks, len(data))
+            samples = np.empty((header.n_signals, n_ticks), dtype=np.int16)
+        samples[indices, :] = data[:n_ticks].T
+
+    return EcgRecord(header, samples)
+
+
+class EcgStore:
+    def __init__(self, directory, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.headers = dict()
+        self.loaded = OrderedDict()     # record name -> EcgRecord, least recently used first
+        self.memory_used = 0
+
+        self.scan()
+
+    def scan(self):
+        # (re-)read all headers of the directory, signal data stays on disk
+        self.headers.clear()
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith('.hea'):
+                header = read_header(os.path.join(self.directory, filename))
+                self.headers[header.name] = header
+
+    def record_names(self):
+        return list(self.headers.keys())
+
+    def header(self, name):
+        return self.headers[name]
+
+    def __contains__(self, name):
+        return name in self.headers
+
+    def __len__(self):
+        return len(self.headers)
+
+    def get(self, name):
+        if name in self.loaded:
+            self.loaded.move_to_end(name)
+            return self.loaded[name]
+        if name not in self.headers:
+            raise KeyError(f"unknown record '{name}'")
+
+        record = load_record(self.headers[name])
+        self.loaded[name] = record
+        self.memory_used += record.nbytes
+        self._evict()
+        return record
+
+    def lead(self, name, lead):
+        return self.get(name).lead(lead)
+
+    def _evict(self):
+        # the most recently used record always stays, even if it alone exceeds the budget
+        while self.memory_used > self.memory_budget and len(self.loaded) > 1:
+            _, record = self.loaded.popitem(last=False)
+            self.memory_used -= record.nbytes
+
+    def release(self, name=None):
+        if name is None:
+            self.loaded.clear()
+            self.memory_used = 0
+        elif name in self.loaded:
+            self.memory_used -= self.loaded.pop(name).nbytes
@@ -0,0 +1,134 @@
+# Parser for WFDB header files (.hea) as used by the MIT-BIH databases
+#
+#  Example (record 100):
+#    100 2 360 650000
+#    100.dat 212 200 11 1024 995 -22131 0 MLII
+#    100.dat 212 200 11 1024 1011 20052 0 V5
+#
+#  The first line holds record name, number of signals, sampling frequency and number of samples,
+#  each following line describes one signal (file, format, gain/baseline/units, adc settings, description).
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import os
+import re
+
+DEFAULT_FREQUENCY = 250
+DEFAULT_GAIN = 200
+
+
+class SignalSpec:
+    def __init__(self, filename, fmt, gain=DEFAULT_GAIN, baseline=0, units='mV', adc_resolution=12,
+                 adc_zero=0, initial_value=0, description='', byte_offset=0):
+        self.filename = filename
+        self.format = fmt
+        self.gain = gain
+        self.baseline = baseline
+        self.units = units
+        self.adc_resolution = adc_resolution
+        self.adc_zero = adc_zero
+        self.initial_value = initial_value
+        self.description = description
+        self.byte_offset = byte_offset
+
+
+class RecordHeader:
+    def __init__(self, name, n_signals, frequency=DEFAULT_FREQUENCY, n_samples=None, signals=None, comments=None):
+        self.name = name
+        self.n_signals = n_signals
+        self.frequency = frequency
+        self.n_samples = n_samples
+        self.signals = signals if signals is not None else []
+        self.comments = comments if comments is not None else []
+        self.directory = ''
+
+    @property
+    def lead_names(self):
+        return [signal.description for signal in self.signals]
+
+    def duration_ms(self):
+        if not self.n_samples:
+            return 0
+        return self.n_samples * 1000 / self.frequency
+
+
+# format field: <format>[x<samples per frame>][:<skew>][+<byte offset>]
+_FORMAT_RE = re.compile(r'^(\d+)(?:x(\d+))?(?::(\d+))?(?:\+(\d+))?$')
+# gain field: <gain>[(<baseline>)][/<units>]
+_GAIN_RE = re.compile(r'^([-+]?[\d.eE+-]+?)(?:\(([-+]?\d+)\))?(?:/(\S+))?$')
+
+
+def _parse_signal(line):
+    fields = line.split()
+    if len(fields) < 2:
+        raise ValueError(f"invalid signal specification: '{line}'")
+
+    match = _FORMAT_RE.match(fields[1])
+    if match is None:
+        raise ValueError(f"invalid signal format '{fields[1]}'")
+    signal = SignalSpec(fields[0], int(match.group(1)), byte_offset=int(match.group(4) or 0))
+
+    baseline = None
+    if len(fields) > 2:
+        match = _GAIN_RE.match(fields[2])
+        if match is None:
+            raise ValueError(f"invalid gain '{fields[2]}'")
+        signal.gain = float(match.group(1)) or DEFAULT_GAIN     # a gain of 0 means 'uncalibrated'
+        if match.group(2) is not None:
+            baseline = int(match.group(2))
+        if match.group(3):
+            signal.units = match.group(3)
+    if len(fields) > 3:
+        signal.adc_resolution = int(fields[3])
+    if len(fields) > 4:
+        signal.adc_zero = int(fields[4])
+    # the baseline defaults to the adc zero value if not given explicitly
+    signal.baseline = baseline if baseline is not None else signal.adc_zero
+    if len(fields) > 5:
+        signal.initial_value = int(fields[5])
+    if len(fields) > 8:
+        signal.description = ' '.join(fields[8:])
+    return signal
+
+
+def parse_header(text):
+    lines = []
+    comments = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#'):
+            comments.append(line[1:].strip())
+        elif line:
+            lines.append(line)
+    if not lines:
+        raise ValueError("empty header")
+
+    fields = lines[0].split()
+    if len(fields) < 2:
+        raise ValueError(f"invalid record line: '{lines[0]}'")
+    header = RecordHeader(fields[0].split('/')[0], int(fields[1]), comments=comments)
+    if len(fields) > 2:
+        # frequency field: <frequency>[/<counter frequency>[(<base counter>)]]
+        header.frequency = float(fields[2].split('/')[0])
+    if len(fields) > 3:
+        header.n_samples = int(fields[3])
+
+    for line in lines[1:1 + header.n_signals]:
+        signal = _parse_signal(line)
+        if not signal.description:
+            signal.description = f"signal {len(header.signals)}"
+        header.signals.append(signal)
+    if len(header.signals) != header.n_signals:
+        raise ValueError(f"header announces {header.n_signals} signals, found {len(header.signals)}")
+    return header
+
+
+def read_header(filename):
+    with open(filename, "r") as f:
+        header = parse_header(f.read())
+    header.directory = os.path.dirname(filename)
+    return header
@@ -11,98 +11,136 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import math
-import base64
 
-import socket
+from ecg.exporter import export_lead
+from ecg.format212 import Format212Record
+from ecg.lookup import lookup_samples
+from ecg.monitor import SweepMonitor
+from ecg.plotting import LodPlot
+from ecg.server import run_server
+
 HOST = "192.168.1.28"  # Standard loopback interface address (localhost)
 PORT = 65432  # Port to listen on (non-privileged ports are > 1023)
 
 class EcgSim:
+    LEADS = {'MLII': 0, 'V1': 1}
+
     def __init__(self, dataset_name):
         self.filename = dataset_name
-        self.sample_mlii = []
-        self.sample_v1 = []
-
-    def load_data_212(self):
-        with open(self.filename, "rb") as f:
-            b = f.read(3)
-            while len(b) == 3:
-                part1 = (b[1] >> 4) * 256 + b[0]
-                part2 = (b[1] & 0x0f) * 256 + b[2]
-                # print(f"val1 {part1} / val2 {part2}")
-                self.sample_mlii.append(part1)
-                self.sample_v1.append(part2)
-                b = f.read(3)
+        self.frequency = 360    # samples per second
+        self.record = None
+        self.samples = None     # int16 array of shape (ticks, leads), column 0 = MLII, column 1 = V1
+        self.first_tick = 0     # record tick of samples[0], only not 0 after a partial load_data_212
+        self.mlii_view = None   # memoryview of the whole MLII lead for the scalar get_MLii
+
+    @property
+    def sample_mlii(self):
+        return self._get_samples()[:, 0]
+
+    @property
+    def sample_v1(self):
+        return self._get_samples()[:, 1]
+
+    def _get_samples(self):
+        # all ticks of the record; if only a window was decoded so far, the whole record is decoded now
+        if self.record is None:
+            return np.empty((0, 2), dtype=np.int16)
+        if self.samples is None or self.first_tick != 0 or len(self.samples) < self.record.n_frames:
+            self.samples = self.record.read()
+            self.first_tick = 0
+            self.mlii_view = None
+        return self.samples
+
+    def load_data_212(self, start=0, stop=None, lazy=False):
+        # memory-map the .dat file; in lazy mode nothing is decoded until samples are requested, otherwise
+        # the ticks [start, stop) are decoded right away. Times and ticks always refer to the whole record.
+        self.record = Format212Record(self.filename, n_signals=2)
+        self.samples = None
+        self.first_tick = 0
+        self.mlii_view = None
+        if not lazy:
+            self.first_tick = max(0, min(start, self.record.n_frames))
+            self.samples = self.record.read(start, stop)
+
+    def get_range(self, start, stop):
+        # decode only the ticks [start, stop) of both leads, taken from the decoded samples if they cover them
+        stop = self.record.n_frames if stop is None else min(stop, self.record.n_frames)
+        start = max(0, min(start, stop))
+        if self.samples is not None and self.first_tick <= start and stop <= self.first_tick + len(self.samples):
+            return self.samples[start - self.first_tick:stop - self.first_tick]
+        return self.record.read(start, stop)
+
+    def duration_ms(self):
+        n_ticks = self.record.n_frames if self.record is not None else 0
+        return n_ticks * 1000 / self.frequency
+
+    def lead_column(self, lead):
+        if isinstance(lead, str):
+            if lead not in self.LEADS:
+                raise KeyError(f"unknown lead '{lead}', available leads: {', '.join(self.LEADS)}")
+            return self.LEADS[lead]
+        if not 0 <= lead < len(self.LEADS):
+            raise KeyError(f"lead index {lead} out of range")
+        return lead
+
+    def lead_samples(self, lead):
+        # view on all decoded samples of one lead
+        return self._get_samples()[:, self.lead_column(lead)]
+
+    def get_samples(self, lead, t_ms, interpolate=False, wrap=True):
+        # returns the samples of a lead for an array of timestamps [in ms], see ecg/lookup.py
+        if len(self._get_samples()) == 0:
+            raise ValueError("no ECG data loaded, call load_data_212() first")
+        return lookup_samples(self.lead_samples(lead), self.frequency, t_ms, interpolate, wrap)
 
     def get_MLii(self, millisecond):
-        while millisecond > 30 * 60000 * 360:
-            millisecond -= (30 * 60000 * 360)
-        try:
-            # tick position is: t [in ms] * 360/1000
-            val = self.sample_mlii[ int(millisecond * 360/1000) ]
-        except:
-            val = 0
-        return val
-
-
-def start_server(sim):
-    # serve via socket and return the value of a certain milliseconds
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((HOST, PORT))
-        s.listen()
-        conn, addr = s.accept()
-        with conn:
-            print(f"Connected by {addr}")
-            while True:
-                bytes_in = list(conn.recv(4))
-                while len(bytes_in) < 4:
-                    bytes_in.append(list(conn.recv(1))[0])
-                if len(bytes_in) == 4:
-                    #print(bytes_in)
-                    if not bytes:
-                        print("no data incoming")
-                    else:
-                        ms = bytes_in[0] + (bytes_in[1] << 8) + (bytes_in[2] << 16) + (bytes_in[3] << 24)
-                        if ms > 1000 * 60 * 360 * 5:
-                            ms = divmod(ms, 1000 * 60 * 360 * 5)[1]
-                        #print(f"Millis: {ms}")
-                        data = sim.get_MLii(ms)
-                        bytes_data = bytearray(((data & 0xFF), ((data >> 8) & 0xFF)))
-                        #print("Sending")
-                        #print(bytes_data)
-                        conn.sendall(bytes_data)
-                else:
-                    print("bytes not enough")
-
-
-def export_matplot(sim):
-    # plot with matplotlib
-    plt.figure(figsize=(12, 6))
-    plt.title(f"ECG simulation")
-    plt.xlabel("t [in seconds]")
-    plt.ylabel("y [ADC mV]")
-    plt.xticks(fontsize=20)
-    plt.yticks(fontsize=20)
-    # n = len(sim.sample_mii)
-    n = 360 * 5
-    plt.plot(np.arange(0, n) / 360, sim.sample_mlii[:n], 'r:', linewidth=2.0)
-    # plt.plot(np.arange(0, n) / 360, sim.sample_v1[:n], 'b:', linewidth=1.0)
+        # scalar shortcut of get_samples('MLII', millisecond), use get_samples for more than one timestamp.
+        # Indexing a memoryview gives a plain int without going through NumPy's scalar machinery, which
+        # matters for callers like the legacy server mode that ask for one sample at a time.
+        if self.mlii_view is None:
+            samples = self._get_samples()
+            if len(samples) == 0:
+                raise ValueError("no ECG data loaded, call load_data_212() first")
+            self.mlii_view = memoryview(np.ascontiguousarray(samples[:, 0]))
+        return self.mlii_view[math.floor(millisecond * self.frequency / 1000) % len(self.mlii_view)]
+
+
+def start_server(sim, host=HOST, port=PORT):
+    # serve many clients via asyncio, see ecg/server.py for the legacy and the framed protocol
+    run_server(sim, host, port)
+
+
+def export_matplot(sim, leads=('MLII',), seconds=None):
+    # plot with matplotlib, the whole record is shown through a min/max level-of-detail pyramid
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.set_title(f"ECG simulation")
+    ax.set_xlabel("t [in seconds]")
+    ax.set_ylabel("y [ADC mV]")
+    ax.tick_params(labelsize=20)
+    lod = LodPlot(ax, sim, leads)
+    if seconds is not None:
+        ax.set_xlim(0, seconds)
     plt.show()
+    return lod
+
+
+def start_monitor(sim, leads=('MLII', 'V1'), window_seconds=5, fps=30):
+    # live sweep display of the record, see ecg/monitor.py
+    monitor = SweepMonitor(sim, leads, window_seconds, fps)
+    monitor.run()
+    return monitor
 
 
-def export_data(sim, filename, total_ticks=1024, delta_millis=20):
-    with open(filename, "wb") as f:
-        for i in range(total_ticks):
-            value = sim.get_MLii(delta_millis * i)
-            byt = value.to_bytes(2)
-            f.write(base64.b64encode(byt))
-        f.close()
+def export_data(sim, filename, total_ticks=1024, delta_millis=20, fmt='legacy', lead='MLII'):
+    # streams the resampled lead to a file, see ecg/exporter.py for the formats
+    return export_lead(sim, filename, lead, total_ticks, delta_millis, fmt)
 
 
 if __name__ == '__main__':
     sim = EcgSim("data/100.dat")
     sim.load_data_212()
     # xexport_data(sim, "data/export.bytes")
+    # start_monitor(sim)
     export_matplot(sim)
 
 
@@ -0,0 +1,173 @@
+# Headless batch renderer: windowed PNG/JPEG previews of DICOM files, series and directories
+#
+#  usage: python -m imaging.batch <file or directory> [...] --out <directory>
+#                                 [--preset brain --preset lungs --preset 40,400 --preset auto]
+#                                 [--format png|jpeg] [--thumbnail 256] [--stack] [--workers N]
+#
+#  Every input file becomes one image per preset, rendered by the level/window engine of the viewer
+#  (imaging/levelwindow.py) on a process pool. At most two files per worker are in flight and every
+#  worker writes its images itself, so memory stays bounded for any number of files. Directories are
+#  searched recursively; with --stack the files of each directory are treated as one series and
+#  written as a numbered slice stack in slice order.
+#
+#  (c) 2025 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pydicom
+from PIL import Image
+
+from imaging.levelwindow import LevelWindowEngine
+from imaging.presets import PRESETS, Histogram
+
+FORMATS = {'png': '.png', 'jpeg': '.jpg'}
+
+
+def preset_file_name(name):
+    # "abdomen: soft tissues" -> "abdomen_soft_tissues", unique for every preset
+    return "_".join(part.strip().replace(' ', '_').replace('/', '_') for part in name.split(':'))
+
+
+def parse_preset(text):
+    # "auto", "<level>,<window>" or a preset name (also just the part after the colon, e.g. "lungs",
+    # as long as only one preset is called like that)
+    text = text.strip()
+    if text.lower() == 'auto':
+        return 'auto', None
+    if ',' in text:
+        level, window = (float(v) for v in text.split(','))
+        return f"L{level:g}_W{window:g}", (level, window)
+    for name, level_window in PRESETS.items():
+        if text.lower() == name.lower():
+            return preset_file_name(name), level_window
+    matches = [name for name in PRESETS if name.split(':')[-1].strip().lower() == text.lower()]
+    if len(matches) > 1:
+        raise ValueError(f"preset '{text}' is ambiguous, use one of: {', '.join(matches)}")
+    if matches:
+        return preset_file_name(matches[0]), PRESETS[matches[0]]
+    raise ValueError(f"unknown preset '{text}', available: {', '.join(PRESETS)}")
+
+
+def collect_jobs(inputs, out_dir, stack=False):
+    # returns a list of (dicom path, output path without preset and extension)
+    jobs = []
+    for path in inputs:
+        if os.path.isfile(path):
+            jobs.append((path, os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])))
+            continue
+        for directory, _, files in os.walk(path):
+            files = sorted(files)
+            if not files:
+                continue
+            relative = os.path.relpath(directory, path)
+            target = os.path.normpath(os.path.join(out_dir, os.path.basename(os.path.abspath(path)), relative))
+            if stack:
+                from imaging.series import DicomSeries
+                try:
+                    series = DicomSeries(directory, workers=1)
+                except ValueError:
+                    continue    # no images in this directory
+                series.close()
+                jobs.extend((info.path, os.path.join(target, f"{index:04d}")) for index, info in enumerate(series.slices))
+            else:
+                jobs.extend((os.path.join(directory, name), os.path.join(target, os.path.splitext(name)[0]))
+                            for name in files)
+    return jobs
+
+
+def render_file(path, out_stem, presets, fmt='png', thumbnail=None):
+    # runs in the worker process, returns (input bytes, images written)
+    ds = pydicom.dcmread(path)
+    pixels = ds.pixel_array
+    if pixels.ndim == 3 and int(getattr(ds, "NumberOfFrames", 1) or 1) > 1:
+        pixels = pixels[pixels.shape[0] // 2]     # multi-frame: the middle frame as preview
+    if pixels.ndim != 2:
+        raise ValueError(f"unsupported pixel data of shape {pixels.shape}")
+    slope = float(getattr(ds, "RescaleSlope", 1))
+    intercept = float(getattr(ds, "RescaleIntercept", 0))
+
+    engine = LevelWindowEngine()
+    engine.set_image(pixels, slope, intercept)
+    os.makedirs(os.path.dirname(out_stem) or ".", exist_ok=True)
+
+    written = 0
+    for name, level_window in presets:
+        if level_window is None:
+            histogram = Histogram.from_image(pixels, (engine.v_min, engine.v_max))
+            level_window = histogram.auto_window(1, 99, slope, intercept)
+        image = Image.fromarray(engine.render(*level_window))
+        if thumbnail:
+            image.thumbnail((thumbnail, thumbnail), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        image.save(f"{out_stem}_{name}{FORMATS[fmt]}")
+        written += 1
+    return os.path.getsize(path), written
+
+
+def run_batch(jobs, presets, workers=None, fmt='png', thumbnail=None):
+    # generator yielding (path, input bytes, images written, error) in order of completion
+    workers = workers or os.cpu_count() or 1
+    queue = list(jobs)
+    running = dict()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while queue or running:
+            while queue and len(running) < 2 * workers:
+                path, out_stem = queue.pop(0)
+                running[pool.submit(render_file, path, out_stem, presets, fmt, thumbnail)] = path
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                try:
+                    size, written = future.result()
+                    yield path, size, written, None
+                except Exception as e:
+                    yield path, 0, 0, e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render windowed previews of DICOM images without a display")
+    parser.add_argument("inputs", nargs="+", help="DICOM files or directories (searched recursively)")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--preset", action="append", default=None,
+                        help="preset name, 'level,window' or 'auto' (repeatable, default: auto)")
+    parser.add_argument("--format", choices=FORMATS, default='png')
+    parser.add_argument("--thumbnail", type=int, default=None, help="maximum edge length in pixels")
+    parser.add_argument("--stack", action="store_true", help="write each directory as slice stack in slice order")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary and errors")
+    args = parser.parse_args(argv)
+
+    presets = [parse_preset(text) for text in (args.preset or ['auto'])]
+    jobs = collect_jobs(args.inputs, args.out, args.stack)
+
+    start = time.perf_counter()
+    files = images = failed = 0
+    total_bytes = 0
+    for path, size, written, error in run_batch(jobs, presets, args.workers, args.format, args.thumbnail):
+        if error is not None:
+            # files that are no images (DICOMDIR, reports, ...) end up here as well
+            failed += 1
+            print(f"{path}: skipped ({error})")
+            continue
+        files += 1
+        images += written
+        total_bytes += size
+        if not args.quiet and files % 100 == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{files} files, {files / elapsed:.1f} files/s, {total_bytes / elapsed / 2 ** 20:.1f} MB/s")
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"{files} files rendered to {images} images, {failed} skipped, {elapsed:.2f} s: "
+          f"{files / elapsed:.1f} files/s, {total_bytes / elapsed / 2 ** 20:.1f} MB/s")
+    return 1 if failed and not files else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# Multiplanar reconstruction (axial / coronal / sagittal) of a (slices, rows, columns) volume
+#
+#  The three orthogonal planes through a crosshair position are plain NumPy views of the volume, no
+#  data is copied to extract them. A plane is only resampled if its pixels are not square (e.g.
+#  coronal and sagittal planes of a volume with a slice distance larger than the pixel spacing) or it
+#  has to be shrunk to fit the display; then a precomputed nearest-neighbour row/column index map
+#  picks the displayed pixels, so the windowing (see imaging/levelwindow.py) only runs over the pixels
+#  that are actually shown.
+#
+#  (c) 2025 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import numpy as np
+
+PLANES = ('axial', 'coronal', 'sagittal')
+
+
+def plane_view(volume, plane, position):
+    # position = (slice, row, column); coronal and sagittal planes show the last slice on top
+    z, y, x = position
+    if plane == 'axial':
+        return volume[z]
+    if plane == 'coronal':
+        return volume[::-1, y, :]
+    if plane == 'sagittal':
+        return volume[::-1, :, x]
+    raise ValueError(f"unknown plane '{plane}'")
+
+
+def plane_spacing(spacing, plane):
+    # (vertical, horizontal) pixel spacing of a plane for volume spacing (row, column, slice)
+    row, column, slice_ = spacing
+    if plane == 'axial':
+        return row, column
+    if plane == 'coronal':
+        return slice_, column
+    return slice_, row
+
+
+class PlaneGeometry:
+    # maps a plane of shape (height, width) with the given pixel spacing onto square display pixels
+    def __init__(self, shape, spacing, max_size=None, tolerance=1e-3):
+        height, width = shape
+        v_spacing, h_spacing = spacing
+        # display pixel size: the finer of both spacings, larger if the plane does not fit
+        pixel = min(v_spacing, h_spacing)
+        if max_size is not None:
+            pixel = max(pixel, height * v_spacing / max_size, width * h_spacing / max_size)
+
+        self.row_index = self._index(height, v_spacing, pixel, tolerance)
+        self.column_index = self._index(width, h_spacing, pixel, tolerance)
+        self.display_shape = (len(self.row_index) if self.row_index is not None else height,
+                              len(self.column_index) if self.column_index is not None else width)
+
+    @staticmethod
+    def _index(n, spacing, pixel, tolerance):
+        if abs(spacing - pixel) <= tolerance * pixel:
+            return None     # already square: the view is used as it is
+        n_out = max(1, int(round(n * spacing / pixel)))
+        return np.minimum(((np.arange(n_out) + 0.5) * pixel / spacing).astype(np.intp), n - 1)
+
+    @property
+    def identity(self):
+        return self.row_index is None and self.column_index is None
+
+    def resample(self, view):
+        if self.row_index is not None:
+            view = view[self.row_index]
+        if self.column_index is not None:
+            view = view[:, self.column_index]
+        return view
+
+    def to_plane(self, display_row, display_column):
+        # display pixel -> plane pixel, for mouse interaction
+        row = self.row_index[display_row] if self.row_index is not None else display_row
+        column = self.column_index[display_column] if self.column_index is not None else display_column
+        return int(row), int(column)
+
+    def to_display(self, row, column):
+        # plane pixel -> display pixel, for drawing the crosshair
+        if self.row_index is not None:
+            row = int(np.searchsorted(self.row_index, row))
+        if self.column_index is not None:
+            column = int(np.searchsorted(self.column_index, column))
+        return row, column
+
+
+class MprVolume:
+    # renders the three planes of a volume through a crosshair with a shared level/window engine
+    def __init__(self, volume, spacing, engine, max_size=None):
+        self.volume = volume
+        self.engine = engine
+        self.position = [s // 2 for s in volume.shape]
+        self.geometry = dict()
+        self.outputs = dict()
+        for plane in PLANES:
+            view = plane_view(volume, plane, self.position)
+            geometry = PlaneGeometry(view.shape, plane_spacing(spacing, plane), max_size)
+            self.geometry[plane] = geometry
+            self.outputs[plane] = np.empty(geometry.display_shape, dtype=np.uint8)
+
+    def render(self, plane, level, window):
+        view = plane_view(self.volume, plane, self.position)
+        geometry = self.geometry[plane]
+        return self.engine.render_int16(geometry.resample(view), level, window, out=self.outputs[plane])
+
+    def crosshair(self, plane):
+        # (display row, display column) of the crosshair in a plane
+        z, y, x = self.position
+        n_slices = self.volume.shape[0]
+        if plane == 'axial':
+            return self.geometry[plane].to_display(y, x)
+        if plane == 'coronal':
+            return self.geometry[plane].to_display(n_slices - 1 - z, x)
+        return self.geometry[plane].to_display(n_slices - 1 - z, y)
+
+    def set_from_plane(self, plane, display_row, display_column):
+        # moves the crosshair to a clicked display pixel, returns the planes whose slice index changed
+        # (position[i] is the slice of PLANES[i]); only these have to be re-rendered
+        row, column = self.geometry[plane].to_plane(display_row, display_column)
+        n_slices = self.volume.shape[0]
+        before = list(self.position)
+        if plane == 'axial':
+            self.position[1], self.position[2] = row, column
+        elif plane == 'coronal':
+            self.position[0], self.position[2] = n_slices - 1 - row, column
+        else:
+            self.position[0], self.position[1] = n_slices - 1 - row, column
+        return tuple(other for other, old, new in zip(PLANES, before, self.position) if old != new)
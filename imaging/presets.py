@@ -0,0 +1,109 @@
+# Level / window presets (CT, Hounsfield units) and histogram based auto windowing
+#
+#  Histograms are counted once per image or slice (one np.bincount) and kept with one bin per
+#  integer value. Any percentile is then a binary search in the cumulative counts, O(log bins),
+#  independent of the number of pixels, so auto windowing or switching presets is instant for
+#  any slice of a large series.
+#
+#  (c) 2025 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# (level, window), see the notes at the end of levelwindow_display.py
+PRESETS = OrderedDict([
+    ("head: brain", (40, 80)),
+    ("head: subdural", (75, 215)),
+    ("head: stroke", (32, 8)),
+    ("head: temporal bones", (600, 2800)),
+    ("head: soft tissues", (40, 375)),
+    ("chest: lungs", (-600, 1500)),
+    ("chest: mediastinum", (50, 350)),
+    ("chest: vascular/heart", (200, 600)),
+    ("abdomen: soft tissues", (50, 400)),
+    ("abdomen: liver", (30, 150)),
+    ("spine: soft tissues", (50, 250)),
+    ("spine: bone", (400, 1800)),
+])
+
+VALUE_RANGE = (-2048, 4095)     # values outside are counted in the first/last bin
+
+
+def count_values(image, value_range=VALUE_RANGE):
+    low, high = value_range
+    values = np.clip(np.asarray(image).reshape(-1), low, high).astype(np.intp)
+    values -= low
+    return np.bincount(values, minlength=high - low + 1)
+
+
+class Histogram:
+    def __init__(self, counts=None, value_range=VALUE_RANGE):
+        self.value_range = value_range
+        self.counts = counts if counts is not None else np.zeros(value_range[1] - value_range[0] + 1, dtype=np.int64)
+        self._cumulative = None
+
+    @classmethod
+    def from_image(cls, image, value_range=VALUE_RANGE):
+        return cls(count_values(image, value_range), value_range)
+
+    def add(self, counts):
+        self.counts += counts
+        self._cumulative = None
+
+    @property
+    def total(self):
+        return int(self.cumulative[-1]) if len(self.counts) else 0
+
+    @property
+    def cumulative(self):
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.counts)
+        return self._cumulative
+
+    def percentile(self, p):
+        # smallest value with at least p percent of the pixels at or below it
+        if self.total == 0:
+            return self.value_range[0]
+        position = int(np.searchsorted(self.cumulative, p / 100 * self.total, side='left'))
+        return self.value_range[0] + min(position, len(self.counts) - 1)
+
+    def auto_window(self, low=1.0, high=99.0, slope=1.0, intercept=0.0, min_window=1):
+        # (level, window) in Hounsfield units covering the low..high percentiles of the pixels
+        v_low = slope * self.percentile(low) + intercept
+        v_high = slope * self.percentile(high) + intercept
+        v_low, v_high = min(v_low, v_high), max(v_low, v_high)
+        window = max(min_window, v_high - v_low)
+        return round((v_low + v_high) / 2), round(window)
+
+
+class SeriesHistograms:
+    # per-slice histograms of a series plus their running sum, filled while slices are decoded
+    def __init__(self, n_slices, value_range=VALUE_RANGE):
+        self.value_range = value_range
+        self.slice_counts = np.zeros((n_slices, value_range[1] - value_range[0] + 1), dtype=np.int32)
+        self.done = np.zeros(n_slices, dtype=bool)
+        self.total = Histogram(value_range=value_range)
+        self.lock = threading.Lock()
+
+    def add_slice(self, index, image):
+        if self.done[index]:
+            return
+        counts = count_values(image, self.value_range)
+        with self.lock:
+            if not self.done[index]:
+                self.slice_counts[index] = counts
+                self.done[index] = True
+                self.total.add(counts)
+
+    def slice(self, index):
+        return Histogram(self.slice_counts[index], self.value_range) if self.done[index] else None
+
+    @property
+    def complete(self):
+        return bool(self.done.all())
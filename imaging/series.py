@@ -0,0 +1,301 @@
+# Multi-slice DICOM series: sorting, background decoding and a byte-budgeted slice cache
+#
+#  A series is scanned once without pixel data (stop_before_pixels) and sorted along the slice normal
+#  (ImagePositionPatient projected on the normal of ImageOrientationPatient, InstanceNumber as fallback).
+#  Decoded slices are rescaled to Hounsfield units and stored as int16.
+#
+#  get_slice(i) returns the requested slice immediately (decoding it on the calling thread if needed)
+#  and queues its neighbours on a thread pool. Decoded slices live in an LRU cache with a byte budget,
+#  so browsing a long series keeps memory bounded. read_volume() decodes all slices in parallel into
+#  one contiguous (slices, rows, columns) int16 array, with only one slice per worker queued at a time,
+#  so prefetch requests of the viewer are not stuck behind the whole series.
+#
+#  (c) 2025 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+
+import numpy as np
+import pydicom
+
+from imaging.presets import SeriesHistograms
+
+DEFAULT_CACHE_BYTES = 128 * 1024 * 1024
+PREFETCH_SLICES = 4
+
+
+class SliceInfo:
+    def __init__(self, path, position, instance, slope, intercept, rows, columns):
+        self.path = path
+        self.position = position        # distance along the slice normal [mm], None if unknown
+        self.instance = instance
+        self.slope = slope
+        self.intercept = intercept
+        self.rows = rows
+        self.columns = columns
+
+
+def _slice_info(path):
+    ds = pydicom.dcmread(path, stop_before_pixels=True)
+    position = None
+    if hasattr(ds, "ImagePositionPatient") and hasattr(ds, "ImageOrientationPatient"):
+        orientation = np.array(ds.ImageOrientationPatient, dtype=np.float64)
+        normal = np.cross(orientation[:3], orientation[3:])
+        position = float(np.dot(normal, np.array(ds.ImagePositionPatient, dtype=np.float64)))
+    info = SliceInfo(path, position, int(getattr(ds, "InstanceNumber", 0) or 0),
+                     float(getattr(ds, "RescaleSlope", 1)), float(getattr(ds, "RescaleIntercept", 0)),
+                     int(ds.Rows), int(ds.Columns))
+    return getattr(ds, "SeriesInstanceUID", ""), info, ds
+
+
+def decode_slice(info, out=None):
+    # decodes one slice into Hounsfield units as int16 (into out if given); values outside of the
+    # int16 range are clipped, not wrapped around
+    pixels = pydicom.dcmread(info.path).pixel_array
+    if out is None:
+        out = np.empty(pixels.shape, dtype=np.int16)
+    low, high = np.iinfo(np.int16).min, np.iinfo(np.int16).max
+    if info.slope == 1 and pixels.dtype.kind in "iu":
+        intercept = int(info.intercept)
+        stored = np.iinfo(pixels.dtype)
+        if (stored.min + intercept >= low and stored.max + intercept <= high) or \
+                (int(pixels.min()) + intercept >= low and int(pixels.max()) + intercept <= high):
+            # integer only, no temporary for the usual slope of 1 (e.g. 12 bit values in uint16)
+            np.add(pixels, intercept, out=out, dtype=np.int32, casting='unsafe')
+        else:
+            np.clip(np.add(pixels, intercept, dtype=np.int32), low, high, out=out, casting='unsafe')
+    else:
+        values = pixels * np.float32(info.slope) + np.float32(info.intercept)
+        np.rint(np.clip(values, low, high, out=values), out=out, casting='unsafe')
+    return out
+
+
+class SliceCache:
+    # thread-safe LRU cache of decoded slices with a byte budget
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.slices = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, index):
+        with self.lock:
+            image = self.slices.get(index)
+            if image is not None:
+                self.slices.move_to_end(index)
+            return image
+
+    def put(self, index, image):
+        with self.lock:
+            if index in self.slices:
+                self.bytes -= self.slices.pop(index).nbytes
+            self.slices[index] = image
+            self.bytes += image.nbytes
+            # the slice just added always stays
+            while self.bytes > self.max_bytes and len(self.slices) > 1:
+                _, old = self.slices.popitem(last=False)
+                self.bytes -= old.nbytes
+
+    def __contains__(self, index):
+        with self.lock:
+            return index in self.slices
+
+    def clear(self):
+        with self.lock:
+            self.slices.clear()
+            self.bytes = 0
+
+
+class DicomSeries:
+    def __init__(self, directory, series_uid=None, cache_bytes=DEFAULT_CACHE_BYTES, workers=None,
+                 prefetch=PREFETCH_SLICES, volume_cache=None):
+        self.directory = directory
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.cache = SliceCache(cache_bytes)
+        self.prefetch = prefetch
+        self.pending = dict()       # slice index -> future of a running decode
+        self.lock = threading.Lock()
+        self.volume = None
+        self.series_uid = None
+        self.slices = []
+        self.spacing = (1.0, 1.0, 1.0)     # (row, column, slice) spacing in mm
+        self.volume_cache = volume_cache    # optional imaging.volumecache.VolumeCache
+        self.requested_uid = series_uid
+        self.closed = threading.Event()
+        self.loader = None                  # thread of read_volume_async
+        self.volume_lock = threading.Lock()  # one read_volume at a time, later callers get its result
+
+        cached = volume_cache.load(directory, series_uid) if volume_cache is not None else None
+        if cached is not None:
+            # a cached series opens as memory map, no DICOM file has to be read
+            meta, self.volume = cached
+            self.series_uid = meta["series_uid"]
+            self.slices = [SliceInfo(**info) for info in meta["slices"]]
+            self.spacing = tuple(meta["spacing"])
+        else:
+            self.scan(series_uid)
+        self.histograms = SeriesHistograms(len(self.slices))
+
+    def scan(self, series_uid=None):
+        paths = [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))]
+        paths = [path for path in paths if os.path.isfile(path)]
+
+        series = dict()
+        first_ds = dict()
+        for result in self.executor.map(self._try_slice_info, paths):
+            if result is not None:
+                uid, info, ds = result
+                series.setdefault(uid, []).append(info)
+                first_ds.setdefault(uid, ds)
+        if not series:
+            raise ValueError(f"no DICOM images found in {self.directory}")
+        if series_uid is None:
+            # several series in one directory: take the one with the most slices
+            series_uid = max(series, key=lambda uid: len(series[uid]))
+        if series_uid not in series:
+            raise KeyError(f"series {series_uid} not found in {self.directory}")
+
+        slices = series[series_uid]
+        if all(info.position is not None for info in slices):
+            slices.sort(key=lambda info: (info.position, info.instance))
+        else:
+            slices.sort(key=lambda info: info.instance)
+        shapes = {(info.rows, info.columns) for info in slices}
+        if len(shapes) > 1:
+            raise ValueError(f"slices of series {series_uid} differ in size: {shapes}")
+
+        self.series_uid = series_uid
+        self.slices = slices
+        ds = first_ds[series_uid]
+        row_spacing, column_spacing = [float(v) for v in getattr(ds, "PixelSpacing", (1.0, 1.0))]
+        slice_spacing = float(getattr(ds, "SliceThickness", 1.0) or 1.0)
+        positions = [info.position for info in slices if info.position is not None]
+        if len(positions) == len(slices) and len(slices) > 1:
+            slice_spacing = float(np.median(np.diff(positions))) or slice_spacing
+        self.spacing = (row_spacing, column_spacing, abs(slice_spacing))
+
+    @staticmethod
+    def _try_slice_info(path):
+        try:
+            return _slice_info(path)
+        except (pydicom.errors.InvalidDicomError, AttributeError, ValueError):
+            return None     # not an image of a series (e.g. DICOMDIR or other files)
+
+    def __len__(self):
+        return len(self.slices)
+
+    @property
+    def shape(self):
+        return len(self.slices), self.slices[0].rows, self.slices[0].columns
+
+    def _decode(self, index):
+        image = decode_slice(self.slices[index])
+        self.histograms.add_slice(index, image)
+        self.cache.put(index, image)
+        with self.lock:
+            self.pending.pop(index, None)
+        return image
+
+    def _submit(self, index):
+        with self.lock:
+            future = self.pending.get(index)
+            if future is None and index not in self.cache:
+                future = self.executor.submit(self._decode, index)
+                self.pending[index] = future
+            return future
+
+    def get_slice(self, index):
+        if self.volume is not None:
+            return self.volume[index]
+        image = self.cache.get(index)
+        if image is None:
+            with self.lock:
+                future = self.pending.get(index)
+            # a prefetch of this slice is already running: wait for it instead of decoding twice
+            image = future.result() if future is not None else self._decode(index)
+
+        # neighbours first, alternating in both scroll directions
+        for distance in range(1, self.prefetch + 1):
+            for neighbour in (index + distance, index - distance):
+                if 0 <= neighbour < len(self.slices):
+                    self._submit(neighbour)
+        return image
+
+    def slice_histogram(self, index):
+        # histogram of one slice; counted during decoding, for cached volumes on first request
+        histogram = self.histograms.slice(index)
+        if histogram is None:
+            self.histograms.add_slice(index, self.get_slice(index))
+            histogram = self.histograms.slice(index)
+        return histogram
+
+    def read_volume(self):
+        # decodes all slices in parallel into one contiguous int16 volume (memory-mapped if a volume cache is used);
+        # a call while another one is running waits for it instead of decoding the series a second time
+        if self.volume is not None:
+            return self.volume
+        with self.volume_lock:
+            if self.volume is not None:
+                return self.volume
+            volume = np.empty(self.shape, dtype=np.int16)
+
+            def decode_into(index):
+                cached = self.cache.get(index)
+                if cached is not None:
+                    volume[index] = cached
+                else:
+                    decode_slice(self.slices[index], out=volume[index])
+                self.histograms.add_slice(index, volume[index])
+
+            # at most one queued slice per worker, checking for close() in between
+            indices = iter(range(len(self.slices)))
+            running = set()
+            while True:
+                if self.closed.is_set():
+                    for future in running:
+                        future.cancel()
+                    raise RuntimeError("series is closed")
+                for index in indices:
+                    running.add(self.executor.submit(decode_into, index))
+                    if len(running) >= self.workers:
+                        break
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            if self.volume_cache is not None:
+                volume = self.volume_cache.store(self, volume)
+            self.volume = volume
+            self.cache.clear()
+        return self.volume
+
+    def read_volume_async(self, callback=None):
+        # decodes the volume on a background thread (not the pool, read_volume itself uses the pool)
+        def run():
+            try:
+                self.read_volume()
+            except (CancelledError, RuntimeError):
+                if not self.closed.is_set():
+                    raise
+                return      # the series was closed meanwhile
+            if callback is not None:
+                callback()
+
+        self.loader = threading.Thread(target=run, daemon=True)
+        self.loader.start()
+        return self.loader
+
+    def close(self):
+        # stops a background volume load first (it ends after the slices being decoded), then the pool
+        self.closed.set()
+        if self.loader is not None and self.loader is not threading.current_thread():
+            self.loader.join()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,188 @@
+# Zoom / pan viewport with tile based rendering for large images
+#
+#  Digital X-ray or mammography images (3000x4000 pixels and more) neither fit the viewer nor can be
+#  windowed as a whole at slider speed. The viewport only renders what is visible at screen
+#  resolution: the zoomed image is divided into display tiles of TILE_SIZE x TILE_SIZE pixels, and for
+#  each visible tile a nearest-neighbour row/column index map picks the image pixels that are then
+#  windowed (see LevelWindowEngine.render_region). Rendered tiles are cached per
+#  (image, level, window, zoom), so panning only renders the tiles that scroll into view and the
+#  render cost depends on the screen size, not on the image size.
+#
+#  (c) 2025 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+from collections import OrderedDict
+
+import numpy as np
+
+TILE_SIZE = 256
+MIN_ZOOM = 1 / 64
+MAX_ZOOM = 32.0
+
+
+class TileCache:
+    # LRU cache of rendered uint8 tiles with a byte budget
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        self.tiles[key] = tile
+        self.bytes += tile.nbytes
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, old = self.tiles.popitem(last=False)
+            self.bytes -= old.nbytes
+
+    def clear(self):
+        self.tiles.clear()
+        self.bytes = 0
+
+
+class Viewport:
+    # shows an image of shape (height, width) in a view of (view_width, view_height) display pixels;
+    # zoom = display pixels per image pixel, (scroll_x, scroll_y) = position of the view in the zoomed
+    # image in whole display pixels, so tiles always line up with the view
+    def __init__(self, engine, view_width=512, view_height=512, tile_size=TILE_SIZE, cache_bytes=64 * 2 ** 20):
+        self.engine = engine
+        self.view_width = view_width
+        self.view_height = view_height
+        self.tile_size = tile_size
+        self.cache = TileCache(cache_bytes)
+        self.shape = None
+        self.image = None       # int16 image windowed by render_int16, None: the engine's image
+        self.token = None
+        self.zoom = 1.0
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self.output = None
+
+    def set_image(self, shape, token=None, image=None):
+        # token identifies the image content in the tile cache (e.g. the slice index of a series), tiles
+        # of other tokens stay cached; without a token all tiles are dropped. For int16 images (series
+        # slices) the image is given and windowed through the int16 table, otherwise the image set in
+        # the engine is used.
+        if token is None:
+            self.cache.clear()
+        keep_view = self.shape == tuple(shape)
+        self.shape = tuple(shape)
+        self.image = image
+        self.token = token
+        if not keep_view:
+            self.fit()
+
+    def resize(self, view_width, view_height):
+        self.view_width = max(1, int(view_width))
+        self.view_height = max(1, int(view_height))
+        self.clamp()
+
+    def fit(self):
+        # whole image centred in the view
+        if self.shape is None:
+            return
+        height, width = self.shape
+        self.zoom = min(self.view_width / width, self.view_height / height)
+        self.clamp()
+
+    def zoom_at(self, factor, x, y):
+        # zooms by factor keeping the image point below the display position (x, y) in place
+        if self.shape is None:
+            return
+        image_x, image_y = self.to_image(x, y)
+        self.zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        self.scroll_x = int(round(image_x * self.zoom - x))
+        self.scroll_y = int(round(image_y * self.zoom - y))
+        self.clamp()
+
+    def pan(self, dx, dy):
+        # moves the image by (dx, dy) display pixels
+        self.scroll_x -= int(round(dx))
+        self.scroll_y -= int(round(dy))
+        self.clamp()
+
+    def zoomed_size(self):
+        height, width = self.shape
+        return max(1, int(round(width * self.zoom))), max(1, int(round(height * self.zoom)))
+
+    def clamp(self):
+        # an image smaller than the view is centred (negative scroll), a larger one may not leave the view
+        if self.shape is None:
+            return
+        width, height = self.zoomed_size()
+        self.scroll_x = (width - self.view_width) // 2 if width <= self.view_width \
+            else min(max(self.scroll_x, 0), width - self.view_width)
+        self.scroll_y = (height - self.view_height) // 2 if height <= self.view_height \
+            else min(max(self.scroll_y, 0), height - self.view_height)
+
+    def to_image(self, x, y):
+        # display position -> image coordinates (column, row) as floats
+        return (x + self.scroll_x) / self.zoom, (y + self.scroll_y) / self.zoom
+
+    def visible_tiles(self):
+        # (tile row, tile column) of all tiles intersecting the view
+        width, height = self.zoomed_size()
+        size = self.tile_size
+        x0, y0 = max(self.scroll_x, 0), max(self.scroll_y, 0)
+        x1 = min(self.scroll_x + self.view_width, width)
+        y1 = min(self.scroll_y + self.view_height, height)
+        return [(ty, tx) for ty in range(y0 // size, (y1 - 1) // size + 1)
+                for tx in range(x0 // size, (x1 - 1) // size + 1)]
+
+    def tile(self, ty, tx, level, window):
+        key = (self.token, level, window, self.zoom, ty, tx)
+        tile = self.cache.get(key)
+        if tile is None:
+            tile = self.render_tile(ty, tx, level, window)
+            if self.token is not None or self.image is None:
+                self.cache.put(key, tile)
+        return tile
+
+    def render_tile(self, ty, tx, level, window):
+        # image pixel below the centre of each display pixel of the tile
+        height, width = self.shape
+        zoomed_width, zoomed_height = self.zoomed_size()
+        size = self.tile_size
+        xs = np.arange(tx * size, min((tx + 1) * size, zoomed_width))
+        ys = np.arange(ty * size, min((ty + 1) * size, zoomed_height))
+        columns = np.minimum(((xs + 0.5) / self.zoom).astype(np.intp), width - 1)
+        rows = np.minimum(((ys + 0.5) / self.zoom).astype(np.intp), height - 1)
+        if self.image is not None:
+            return self.engine.render_int16(self.image[np.ix_(rows, columns)], level, window)
+        return self.engine.render_region(rows, columns, level, window)
+
+    def render(self, level, window):
+        # the view as (view_height, view_width) uint8 image, black outside of the image
+        if self.output is None or self.output.shape != (self.view_height, self.view_width):
+            self.output = np.zeros((self.view_height, self.view_width), dtype=np.uint8)
+        out = self.output
+        if self.shape is None:
+            out[:] = 0
+            return out
+        width, height = self.zoomed_size()
+        if width < self.view_width or height < self.view_height:
+            out[:] = 0
+        size = self.tile_size
+        for ty, tx in self.visible_tiles():
+            tile = self.tile(ty, tx, level, window)
+            # intersection of tile and view in zoomed image coordinates
+            x0 = max(tx * size, self.scroll_x)
+            y0 = max(ty * size, self.scroll_y)
+            x1 = min(tx * size + tile.shape[1], self.scroll_x + self.view_width)
+            y1 = min(ty * size + tile.shape[0], self.scroll_y + self.view_height)
+            out[y0 - self.scroll_y:y1 - self.scroll_y, x0 - self.scroll_x:x1 - self.scroll_x] = \
+                tile[y0 - ty * size:y1 - ty * size, x0 - tx * size:x1 - tx * size]
+        return out
@@ -0,0 +1,122 @@
+# Persistent on-disk cache of decoded DICOM series
+#
+#  Every decoded series (int16 Hounsfield units, see imaging/series.py) is stored as a plain .npy file
+#  with a small .json sidecar holding the SeriesInstanceUID, the sorted slice list and the spacing.
+#  Reopening the series is an np.load(mmap_mode='r'): no DICOM parsing, no decoding, pages are only
+#  read from disk when a slice is actually shown.
+#
+#  The key is a hash over the requested SeriesInstanceUID and the names, sizes and modification times
+#  of the files in the directory (a plain os.scandir, no file is opened), so a changed series is decoded
+#  again. If the cache grows beyond its byte budget the least recently opened volumes are deleted.
+#
+#  (c) 2025 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "levelwindow_volumes")
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+
+class VolumeCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(directory, series_uid=None):
+        digest = hashlib.sha1(f"{os.path.abspath(directory)}|{series_uid or '*'}|".encode())
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.is_file():
+                stat = entry.stat()
+                digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def load(self, directory, series_uid=None):
+        # returns (metadata, memory-mapped volume) or None if the series is not cached
+        volume_path, meta_path = self._paths(self.key(directory, series_uid))
+        if not (os.path.exists(volume_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            volume = np.load(volume_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None     # incomplete or damaged entry, will be written again
+        if list(volume.shape) != meta["shape"] or volume.dtype != np.int16:
+            return None
+        os.utime(meta_path)     # the sidecar's mtime is the last access for the eviction
+        return meta, volume
+
+    def store(self, series, volume):
+        # writes the volume and returns it memory-mapped from the cache
+        key = self.key(series.directory, series.requested_uid)
+        volume_path, meta_path = self._paths(key)
+        # written under a unique temporary name first, a reader never sees a half written volume and
+        # two writers of the same series (other threads or processes) do not clash
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=key + ".", suffix=".tmp.npy")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(volume, dtype=np.int16))
+            os.replace(tmp_path, volume_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        meta = dict(series_uid=series.series_uid, shape=list(volume.shape), spacing=list(series.spacing),
+                    slices=[vars(info) for info in series.slices], created=time.time())
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+        self.evict(keep=key)
+        return np.load(volume_path, mmap_mode='r')
+
+    def entries(self):
+        # (last access, bytes, key) of all cached volumes
+        result = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                key = name[:-5]
+                volume_path, meta_path = self._paths(key)
+                if os.path.exists(volume_path):
+                    result.append((os.path.getmtime(meta_path), os.path.getsize(volume_path), key))
+        return result
+
+    def size(self):
+        return sum(nbytes for _, nbytes, _ in self.entries())
+
+    def evict(self, keep=None):
+        entries = sorted(self.entries())
+        total = sum(nbytes for _, nbytes, _ in entries)
+        for _, nbytes, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.remove(key)
+            total -= nbytes
+
+    def remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for _, _, key in self.entries():
+            self.remove(key)
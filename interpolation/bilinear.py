@@ -0,0 +1,154 @@
+# Bilinear interpolation of an N x M grid of control values (e.g. RGB colors)
+#
+#  The control points lie on a rectilinear, possibly non-uniform grid: column m at xs[m], row n at
+#  ys[n], both axes strictly increasing, with values[n, m] at the point (xs[m], ys[n]). A point (x, y)
+#  in the cell (n, m) gets
+#
+#    top    = (1 - tx) * values[n, m]     + tx * values[n, m + 1]
+#    bottom = (1 - tx) * values[n + 1, m] + tx * values[n + 1, m + 1]
+#    value  = (1 - ty) * top + ty * bottom
+#
+#  with tx, ty the relative position inside the cell. The enclosing cell is found by a binary search
+#  on the axis coordinates (O(log n)), and per cell the expanded form
+#
+#    value = a + b * u + c * v + d * u * v        (u = x - xs[m], v = y - ys[n])
+#
+#  is precomputed, so a single point (a drag event) costs two binary searches and one polynomial,
+#  independent of the grid size. Points outside of the grid get the value of the nearest border point.
+#  All functions except value_at() take arrays of points and compute them in one vectorized pass.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+from bisect import bisect_right
+
+import numpy as np
+
+
+class BilinearGrid:
+    def __init__(self, values, xs, ys):
+        # values: (N, M) or (N, M, channels) with N, M >= 2; xs: M column positions, ys: N row positions
+        values = np.asarray(values, dtype=np.float32)
+        if values.ndim == 2:
+            values = values[:, :, None]
+        if values.shape[0] < 2 or values.shape[1] < 2:
+            raise ValueError(f"need at least 2 x 2 control points, got {values.shape[:2]}")
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if (len(ys), len(xs)) != values.shape[:2]:
+            raise ValueError(f"axes of length {len(ys)} x {len(xs)} do not match values of shape {values.shape[:2]}")
+        if np.any(np.diff(xs) <= 0) or np.any(np.diff(ys) <= 0):
+            raise ValueError("axis coordinates must be strictly increasing")
+        self.values = values
+        self.xs = xs
+        self.ys = ys
+        # python lists for the scalar binary search of value_at(), faster than numpy for single values
+        self.x_list = xs.tolist()
+        self.y_list = ys.tolist()
+        self.coefficients = np.empty((len(ys) - 1, len(xs) - 1, 4, values.shape[2]), dtype=np.float64)
+        self.update_coefficients()
+
+    @classmethod
+    def uniform(cls, values, bounds):
+        # control points evenly spread over bounds = (x0, y0, x1, y1) of the corner points
+        values = np.asarray(values)
+        x0, y0, x1, y1 = bounds
+        return cls(values, np.linspace(x0, x1, values.shape[1]), np.linspace(y0, y1, values.shape[0]))
+
+    @property
+    def shape(self):
+        return self.values.shape[:2]
+
+    @property
+    def bounds(self):
+        return self.xs[0], self.ys[0], self.xs[-1], self.ys[-1]
+
+    def update_coefficients(self, rows=slice(None), columns=slice(None)):
+        # a, b, c, d of the cells in the given cell rows and columns
+        v = self.values.astype(np.float64)
+        v00, v01 = v[:-1, :-1][rows, columns], v[:-1, 1:][rows, columns]
+        v10, v11 = v[1:, :-1][rows, columns], v[1:, 1:][rows, columns]
+        dx = np.diff(self.xs)[columns][None, :, None]
+        dy = np.diff(self.ys)[rows][:, None, None]
+        coefficients = self.coefficients[rows, columns]
+        coefficients[:, :, 0] = v00
+        coefficients[:, :, 1] = (v01 - v00) / dx
+        coefficients[:, :, 2] = (v10 - v00) / dy
+        coefficients[:, :, 3] = (v11 - v10 - v01 + v00) / (dx * dy)
+        self.coefficients[rows, columns] = coefficients
+
+    def set_value(self, n, m, value):
+        # only the (up to) four cells sharing the control point change
+        self.values[n, m] = value
+        self.update_coefficients(slice(max(n - 1, 0), n + 1), slice(max(m - 1, 0), m + 1))
+
+    def point(self, n, m):
+        # canvas position of the control point (n, m)
+        return self.x_list[m], self.y_list[n]
+
+    @staticmethod
+    def _axis(p, axis):
+        # cell index and offset from the cell's first coordinate along one axis
+        p = np.clip(np.asarray(p, dtype=np.float64), axis[0], axis[-1])
+        index = np.minimum(np.searchsorted(axis, p, side='right') - 1, len(axis) - 2)
+        return index, p - axis[index]
+
+    def cell(self, x, y):
+        # (row, column, ty, tx) of the cells containing the points, tx and ty relative to the cell size
+        m, u = self._axis(x, self.xs)
+        n, v = self._axis(y, self.ys)
+        return n, m, v / (self.ys[n + 1] - self.ys[n]), u / (self.xs[m + 1] - self.xs[m])
+
+    def locate(self, x, y):
+        # (row, column) of the cell containing a single point (clamped to the grid)
+        x_list, y_list = self.x_list, self.y_list
+        m = min(max(bisect_right(x_list, x) - 1, 0), len(x_list) - 2)
+        n = min(max(bisect_right(y_list, y) - 1, 0), len(y_list) - 2)
+        return n, m
+
+    def value_at(self, x, y):
+        # a single point in constant time apart from the binary searches, e.g. for every drag event
+        x = min(max(x, self.x_list[0]), self.x_list[-1])
+        y = min(max(y, self.y_list[0]), self.y_list[-1])
+        n, m = self.locate(x, y)
+        u = x - self.x_list[m]
+        v = y - self.y_list[n]
+        return np.dot((1.0, u, v, u * v), self.coefficients[n, m])
+
+    def interpolate(self, x, y):
+        # values at the points (x, y), arrays of any (broadcastable) shape -> shape + (channels,)
+        x, y = np.broadcast_arrays(x, y)
+        m, u = self._axis(x, self.xs)
+        n, v = self._axis(y, self.ys)
+        a, b, c, d = np.moveaxis(self.coefficients[n, m], -2, 0)
+        u = u[..., None]
+        v = v[..., None]
+        return a + b * u + v * (c + d * u)
+
+    def render(self, width, height, origin=(0, 0), out=None):
+        # the whole field at the integer positions origin + (0..width-1, 0..height-1) as uint8 image of
+        # shape (height, width, channels). Separable: first along x for every grid row (N x width), then
+        # along y, so every output pixel costs one blend per channel.
+        n, _, ty, _ = self.cell(0, origin[1] + np.arange(height))
+        _, m, _, tx = self.cell(origin[0] + np.arange(width), 0)
+        tx = tx.astype(np.float32)
+        ty = ty.astype(np.float32)
+        rows = self.values[:, m]
+        rows += tx[None, :, None] * (self.values[:, m + 1] - rows)
+        steps = rows[1:] - rows[:-1]
+        if out is None:
+            out = np.empty((height, width, rows.shape[2]), dtype=np.uint8)
+        # blends stay within the range of their control values, so only those have to be checked
+        clip = self.values.min() < 0 or self.values.max() > 255
+        # the output rows of one grid cell row are consecutive: blend them as one block, no gather
+        bounds = np.flatnonzero(np.diff(n)) + 1
+        for a, b in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [height]))):
+            block = ty[a:b, None, None] * steps[n[a]]
+            block += rows[n[a]]
+            if clip:
+                np.clip(block, 0, 255, out=block)
+            np.copyto(out[a:b], block, casting='unsafe')
+        return out
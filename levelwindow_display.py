@@ -8,14 +8,78 @@
 #  Gnu GPL 3.0
 #
 
-import numpy as np
 import pydicom
 import tkinter as tk
 import os
+import time
 from tkinter import filedialog
 from tkinter import ttk
 from PIL import Image, ImageTk
 
+from controls.renderscheduler import RenderScheduler
+from imaging.levelwindow import LevelWindowEngine
+from imaging.mpr import PLANES, MprVolume
+from imaging.presets import PRESETS, Histogram
+from imaging.series import DicomSeries
+from imaging.viewport import Viewport
+from imaging.volumecache import VolumeCache
+
+INT16_RANGE = (-32768, 32767)
+
+
+class MprWindow:
+    # axial, coronal and sagittal pane of a series volume, rendered by the viewer's scheduler
+    def __init__(self, viewer, volume, spacing, max_size=400):
+        self.viewer = viewer
+        self.window = tk.Toplevel(viewer.root)
+        self.window.title("MPR - axial / coronal / sagittal")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.mpr = MprVolume(volume, spacing, viewer.engine, max_size)
+
+        self.canvases = dict()
+        self.photos = dict()
+        self.items = dict()
+        self.lines = dict()
+        for column, plane in enumerate(PLANES):
+            height, width = self.mpr.geometry[plane].display_shape
+            canvas = tk.Canvas(self.window, width=width, height=height, bg="black", highlightthickness=0)
+            canvas.grid(column=column, row=0, sticky='N')
+            tk.Label(self.window, text=plane).grid(column=column, row=1)
+            self.photos[plane] = ImageTk.PhotoImage(Image.new("L", (width, height)))
+            self.items[plane] = canvas.create_image(0, 0, image=self.photos[plane], anchor=tk.NW)
+            self.lines[plane] = (canvas.create_line(0, 0, 0, 0, fill='yellow'),
+                                 canvas.create_line(0, 0, 0, 0, fill='yellow'))
+            canvas.bind("<Button-1>", lambda event, p=plane: self.on_click(p, event))
+            canvas.bind("<B1-Motion>", lambda event, p=plane: self.on_click(p, event))
+            self.canvases[plane] = canvas
+        self.update_crosshairs()
+
+    def on_click(self, plane, event):
+        height, width = self.mpr.geometry[plane].display_shape
+        row = min(max(event.y, 0), height - 1)
+        column = min(max(event.x, 0), width - 1)
+        changed = self.mpr.set_from_plane(plane, row, column)
+        self.update_crosshairs()
+        if changed:
+            self.viewer.scheduler.request(*changed)
+
+    def update_crosshairs(self):
+        for plane in PLANES:
+            height, width = self.mpr.geometry[plane].display_shape
+            row, column = self.mpr.crosshair(plane)
+            horizontal, vertical = self.lines[plane]
+            self.canvases[plane].coords(horizontal, 0, row, width, row)
+            self.canvases[plane].coords(vertical, column, 0, column, height)
+
+    def render(self, planes, level, window):
+        for plane in planes:
+            self.photos[plane].paste(Image.fromarray(self.mpr.render(plane, level, window)))
+
+    def close(self):
+        self.viewer.mpr_window = None
+        self.window.destroy()
+
+
 class MedicalImageViewer:
     def __init__(self, root):
         self.root = root
@@ -27,12 +91,42 @@ class MedicalImageViewer:
         # load the image
         self.load_button = tk.Button(root, text="Load Image...", command=self.load_image)
         self.load_button.pack(side=tk.TOP)
+        self.load_series_button = tk.Button(root, text="Load Series...", command=self.load_series)
+        self.load_series_button.pack(side=tk.TOP)
+        self.mpr_button = tk.Button(root, text="MPR View", command=self.open_mpr)
+        self.mpr_button.pack(side=tk.TOP)
+
+        # presets and histogram based auto window
+        self.preset_frame = tk.Frame(root)
+        self.preset_frame.pack(side=tk.TOP)
+        self.preset_box = ttk.Combobox(self.preset_frame, values=list(PRESETS), state="readonly", width=24)
+        self.preset_box.set("Preset...")
+        self.preset_box.bind("<<ComboboxSelected>>", self.on_preset)
+        self.preset_box.pack(side=tk.LEFT)
+        self.auto_button = tk.Button(self.preset_frame, text="Auto Window", command=self.auto_window)
+        self.auto_button.pack(side=tk.LEFT)
         self.img_title = tk.Label(root, text="-")
         self.img_title.pack(side=tk.TOP)
 
-        # display the image
-        self.image_label = tk.Label(root)
-        self.image_label.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        # display the image: zoom with ctrl + mouse wheel (or the wheel for single images), pan by dragging,
+        # double click fits the image into the view
+        self.image_canvas = tk.Canvas(root, width=512, height=256, bg="black", highlightthickness=0)
+        self.image_canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.image_item = self.image_canvas.create_image(0, 0, anchor=tk.NW)
+        self.image_canvas.bind("<Configure>", self.on_resize)
+        self.image_canvas.bind("<ButtonPress-1>", self.start_pan)
+        self.image_canvas.bind("<B1-Motion>", self.drag_pan)
+        self.image_canvas.bind("<Double-Button-1>", lambda event: self.fit_view())
+
+        self.status = tk.Label(root, text="-")
+        self.status.pack(side=tk.BOTTOM)
+
+        # slice selection for series (mouse wheel over the image scrolls as well)
+        self.slice_slider = tk.Scale(root, label="Slice", from_=0, to=0, orient=tk.HORIZONTAL, command=self.update_slice)
+        self.slice_slider.pack(side=tk.BOTTOM, fill=tk.X)
+        self.image_canvas.bind("<MouseWheel>", lambda event: self.on_wheel(event, 1 if event.delta > 0 else -1))
+        self.image_canvas.bind("<Button-4>", lambda event: self.on_wheel(event, 1))
+        self.image_canvas.bind("<Button-5>", lambda event: self.on_wheel(event, -1))
 
         # sliders for level and window
         self.level_slider = tk.Scale(root, label="Level", from_=-1024, to=3071, orient=tk.HORIZONTAL, command=self.update_image)
@@ -44,50 +138,188 @@ class MedicalImageViewer:
 
         # Initialize variables
         self.image = None
+        self.histogram = None
+        self.series = None
+        self.mpr_window = None
+        self.volume_cache = VolumeCache()
+        self.engine = LevelWindowEngine()
+        self.viewport = Viewport(self.engine)
+        self.series_number = 0      # part of the tile cache key, increased for every loaded series
+        self.pan_start = None
+        self.tk_image = None
+        self.last_status = 0.0
+        self.scheduler = RenderScheduler(root, self.render)
 
     def load_image(self):
         file_path = filedialog.askopenfilename()
         if file_path:
             # self.image = np.array(Image.open(file_path)) # cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
             dicom_image = pydicom.dcmread(file_path)
-            self.image = np.array(dicom_image.pixel_array, dtype=int)
+            # stored values stay in their integer type, hounsfield units are applied through the lookup table
+            self.close_series()
+            self.image = dicom_image.pixel_array
+            slope = float(getattr(dicom_image, "RescaleSlope", 1))
+            intercept = float(getattr(dicom_image, "RescaleIntercept", 0))
+            self.engine.set_image(self.image, slope, intercept)
+            self.viewport.set_image(self.image.shape)
+            self.histogram = Histogram.from_image(self.image, (self.engine.v_min, self.engine.v_max))
 
-            # bring the image into hounsfield units
-            if hasattr(dicom_image, "RescaleIntercept"):
-                self.image = dicom_image.RescaleSlope * self.image + dicom_image.RescaleIntercept
-
-            print(f"min: {self.image.min()}, max: {self.image.max()}")
             if self.image is not None:
                 self.img_title.config(text=os.path.split(file_path)[1])
                 self.display_image()
 
+    def load_series(self):
+        directory = filedialog.askdirectory()
+        if directory:
+            self.close_series()
+            self.series = DicomSeries(directory, volume_cache=self.volume_cache)
+            self.series_number += 1
+            if self.series.volume is None:
+                # first time: decode the whole series into the cache while the user already browses
+                self.series.read_volume_async()
+            self.slice_slider.config(to=len(self.series) - 1)
+            self.slice_slider.set(len(self.series) // 2)
+            self.image = self.series.get_slice(len(self.series) // 2)
+            # slices are already hounsfield units: no rescale, one table range for the whole series
+            self.engine.set_image(self.image, value_range=INT16_RANGE)
+            self.viewport.set_image(self.image.shape, (self.series_number, len(self.series) // 2), self.image)
+            self.img_title.config(text=f"{os.path.split(directory)[1]} ({len(self.series)} slices)")
+            self.display_image()
+
+    def set_level_window(self, level, window):
+        # the slider commands request the render
+        self.level_slider.set(level)
+        self.window_slider.set(window)
+
+    def on_preset(self, event=None):
+        level, window = PRESETS[self.preset_box.get()]
+        self.set_level_window(level, window)
+
+    def auto_window(self, low=1.0, high=99.0):
+        if self.series is not None:
+            histogram = self.series.slice_histogram(self.slice_slider.get())
+            self.set_level_window(*histogram.auto_window(low, high))
+        elif self.histogram is not None:
+            self.set_level_window(*self.histogram.auto_window(low, high, self.engine.slope, self.engine.intercept))
+
+    def open_mpr(self):
+        if self.series is None or self.mpr_window is not None:
+            return
+        loader = self.series.loader
+        if loader is not None and loader.is_alive():
+            # the volume is still decoded in the background: open the panes when it is done, the Tk
+            # thread must not block on it
+            self.mpr_button.config(text="MPR View (loading...)", state=tk.DISABLED)
+            self.root.after(100, self.wait_for_volume, self.series)
+            return
+        # the panes need the whole volume (instant if the series is in the volume cache or already loaded)
+        volume = self.series.read_volume()
+        self.mpr_window = MprWindow(self, volume, self.series.spacing)
+        self.scheduler.request(*PLANES)
+
+    def wait_for_volume(self, series):
+        if series is not self.series:
+            return      # another series was loaded meanwhile, close_series reset the button
+        if series.loader.is_alive():
+            self.root.after(100, self.wait_for_volume, series)
+            return
+        self.mpr_button.config(text="MPR View", state=tk.NORMAL)
+        self.open_mpr()
+
+    def close_series(self):
+        if self.mpr_window is not None:
+            self.mpr_window.close()
+        self.mpr_button.config(text="MPR View", state=tk.NORMAL)
+        if self.series is not None:
+            self.series.close()
+            self.series = None
+            self.slice_slider.config(to=0)
+            # the tiles of the slices are of no use any more
+            self.viewport.cache.clear()
+
+    def scroll_slices(self, step):
+        if self.series is not None:
+            self.slice_slider.set(min(max(self.slice_slider.get() + step, 0), len(self.series) - 1))
+
+    def on_wheel(self, event, step):
+        # the wheel browses the slices of a series, with ctrl (and for single images) it zooms
+        if self.series is not None and not event.state & 0x0004:
+            self.scroll_slices(-step)
+        elif self.image is not None:
+            self.viewport.zoom_at(1.25 if step > 0 else 0.8, event.x, event.y)
+            self.scheduler.request()
+
+    def start_pan(self, event):
+        self.pan_start = (event.x, event.y)
+
+    def drag_pan(self, event):
+        if self.pan_start is not None and self.image is not None:
+            self.viewport.pan(event.x - self.pan_start[0], event.y - self.pan_start[1])
+            self.pan_start = (event.x, event.y)
+            self.scheduler.request()
+
+    def fit_view(self):
+        self.viewport.fit()
+        self.scheduler.request()
+
+    def on_resize(self, event):
+        self.viewport.resize(event.width, event.height)
+        self.scheduler.request()
+
     def apply_level_window(self, image, level, window):
-        min_val = level - (window / 2)
-        max_val = level + (window / 2)
-        windowed_image = np.clip(image, min_val, max_val)
-        windowed_image = ((windowed_image - (min_val)) / window) * 255
-        print(f"{windowed_image.min()},{windowed_image.max()} ")
-        return windowed_image.astype(np.uint8)
+        # one lookup table gather into the engine's output buffer, see imaging/levelwindow.py
+        if image is not self.engine.image:
+            self.engine.set_image(image)
+        return self.engine.render(level, window)
 
     def display_image(self):
-        level = self.level_slider.get()
-        window = self.window_slider.get()
-        windowed_image = self.apply_level_window(self.image, level, window)
-        pil_image = Image.fromarray(windowed_image)
-        tk_image = ImageTk.PhotoImage(image=pil_image)
+        self.scheduler.request()
 
-        self.image_label.config(image=tk_image)
-        self.image_label.image = tk_image
+    def update_slice(self, val):
+        # the slice only applies to the main image, the MPR panes keep their own crosshair position
+        if self.image is not None:
+            self.scheduler.request()
 
     def update_image(self, val):
         if self.image is not None:
-            level = self.level_slider.get()
-            window = self.window_slider.get()
-            windowed_image = self.apply_level_window(self.image, level, window)
-            pil_image = Image.fromarray(windowed_image)
-            tk_image = ImageTk.PhotoImage(image=pil_image)
-            self.image_label.config(image=tk_image)
-            self.image_label.image = tk_image
+            # level and window apply to all panes
+            if self.mpr_window is not None:
+                self.scheduler.request(None, *PLANES)
+            else:
+                self.scheduler.request()
+
+    def render(self, keys=None):
+        # the only render path: called by the scheduler at most once per frame for all requested panes
+        if self.image is None:
+            return
+        keys = keys if keys is not None else {None}
+        level = self.level_slider.get()
+        window = self.window_slider.get()
+        if self.mpr_window is not None and keys & set(PLANES):
+            self.mpr_window.render([plane for plane in PLANES if plane in keys], level, window)
+        if None not in keys:
+            return
+
+        if self.series is not None:
+            # slices are int16 hounsfield units, windowed directly through the int16 table; the tiles
+            # of each slice stay cached, so browsing back and forth reuses them
+            index = self.slice_slider.get()
+            self.image = self.series.get_slice(index)
+            self.viewport.set_image(self.image.shape, (self.series_number, index), self.image)
+        # only the visible part is windowed, at screen resolution (see imaging/viewport.py)
+        pil_image = Image.fromarray(self.viewport.render(level, window))
+
+        # paste into the existing photo image, a new one is only needed if the size changes
+        if self.tk_image is None or (self.tk_image.width(), self.tk_image.height()) != pil_image.size:
+            self.tk_image = ImageTk.PhotoImage(image=pil_image)
+            self.image_canvas.itemconfig(self.image_item, image=self.tk_image)
+        else:
+            self.tk_image.paste(pil_image)
+
+        now = time.perf_counter()
+        if now - self.last_status > 0.5:
+            self.status.config(text=self.scheduler.stats.summary())
+            self.last_status = now
 
 
 if __name__ == '__main__':
@@ -99,6 +331,8 @@ if __name__ == '__main__':
 
 
 '''
+    (available as presets in imaging/presets.py)
+
     head and neck
         brain W:80 L:40
         subdural W:130-300 L:50-100
@@ -6,12 +6,17 @@
 #  Gnu GPL 3.0
 #
 
+import argparse
 import random
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.filedialog as filedialog
 import time
 import numpy as np
+from PIL import Image, ImageTk
+
+from controls.appruntime import AppRuntime
+from interpolation.bilinear import BilinearGrid
 
 
 def random_color():
@@ -44,10 +49,11 @@ def rgb_to_hex(r, g, b):
 class UIWindow:
     VERSION = "0.9"
 
-    def __init__(self):
+    def __init__(self, rows=2, columns=2, xs=None, ys=None):
+        # rows x columns control points, by default evenly spread; xs / ys: (non-uniform) positions
         self.window = tk.Tk()
         self.window.title("Linear Interpolation Demo")
-        self.running = True
+        self.runtime = AppRuntime(self.window)
         self.show_intermediate_step = False
 
         self.window.grid_columnconfigure(0, weight=1)
@@ -59,19 +65,36 @@ class UIWindow:
         self.result = tk.Label(self.window, text="Drag the inner circle to interpolate. Right click to choose color.")
         self.result.grid(column=0, row=1, sticky='NW')
 
-        # Matrices are as follows:
+        # field mode: the whole interpolated field is rendered as background image
+        self.show_field = tk.BooleanVar(value=False)
+        self.field_check = tk.Checkbutton(self.window, text="Show interpolated field", variable=self.show_field,
+                                          command=self.render_field)
+        self.field_check.grid(column=0, row=2, sticky='NW')
+        self.status = tk.Label(self.window, text="-")
+        self.status.grid(column=0, row=3, sticky='NW')
+        self.runtime.every(1000, lambda: self.status.config(text=self.runtime.stats.summary()))
+
+        # Matrices are as follows (for 2 x 2):
         # [ left up      right up   ]
         # [ left down    right down ]
-        self.coords = [[ [25, 25],  [375, 25 ]],
-                       [ [25, 375], [375, 375]]]
-        self.rc = [['',''], ['','']]
-        self.colors = [[random_intensity(), random_intensity()],
-                       [random_intensity(), random_intensity()]]
-
-        for n in range(0, 2):
-            for m in range(0, 2):
+        xs = np.linspace(25, 375, columns) if xs is None else xs
+        ys = np.linspace(25, 375, rows) if ys is None else ys
+        self.coords = [[[x, y] for x in xs] for y in ys]
+        self.rc = [['' for _ in range(columns)] for _ in range(rows)]
+        self.colors = [[random_intensity() for _ in range(columns)] for _ in range(rows)]
+        # the same colors as rgb values for the interpolation, see interpolation/bilinear.py
+        self.grid = BilinearGrid([[hex_to_rgb(color) for color in row] for row in self.colors], xs, ys)
+        # control squares shrink for dense grids
+        size = min(25, 0.3 * min(np.min(np.diff(xs)), np.min(np.diff(ys))))
+
+        self.field_photo = None
+        self.field_image = self.canvas.create_image(0, 0, anchor=tk.NW, state=tk.HIDDEN)
+        self.canvas.bind("<Configure>", lambda event: self.render_field())
+
+        for n in range(0, rows):
+            for m in range(0, columns):
                 (x1, y1) = self.coords[n][m]
-                self.rc[n][m] = self.canvas.create_rectangle(x1-25, y1-25, x1+25, y1+25,
+                self.rc[n][m] = self.canvas.create_rectangle(x1-size, y1-size, x1+size, y1+size,
                                                              fill=self.colors[n][m])
                 self.canvas.tag_bind(self.rc[n][m], "<Button-2>", lambda event, i=n, j=m: self.change_color(event, i, j))
 
@@ -90,46 +113,40 @@ class UIWindow:
 
     def interpolate_color(self, x, y):
         # calculate the interpolated color
-        m = 0
-        n = 0
-
-        # gn = (xm+1-x)/(xm+1-xm) * color(xm,yn) + (x-xm)/(xm+1-xm) * color(xm+1, yn)
-        rel_distance_to_right = (self.coords[n][m+1][0]-x)/(self.coords[n][m+1][0]-self.coords[n][m][0])
-        rel_distance_to_left = (x-self.coords[n][m][0])/(self.coords[n][m+1][0]-self.coords[n][m][0])
-
-        # with idx 0 --> upper linear interpolated color
-        color_left = hex_to_rgb(self.colors[n][m])
-        color_right = hex_to_rgb(self.colors[n][m+1])
-        rgb0 = rel_distance_to_right * np.array(color_left) + rel_distance_to_left * np.array(color_right)
         if self.show_intermediate_step:
-            r, g, b = rgb0
-            color = rgb_to_hex(int(r), int(g), int(b))
-            self.canvas.itemconfig(self.temp_rect1, fill=color)
-            self.canvas.moveto(self.temp_rect1, 350*rel_distance_to_left, 0)
+            # upper and lower linear interpolated colors: the value at x on the upper and lower cell border
+            n, m = self.grid.locate(x, y)
+            rgb0 = self.grid.value_at(x, self.grid.y_list[n])
+            rgb1 = self.grid.value_at(x, self.grid.y_list[n + 1])
+            self.canvas.itemconfig(self.temp_rect1, fill=rgb_to_hex(*rgb0.astype(int)))
+            self.canvas.moveto(self.temp_rect1, x - 25, 0)
+            self.canvas.itemconfig(self.temp_rect2, fill=rgb_to_hex(*rgb1.astype(int)))
+            self.canvas.moveto(self.temp_rect2, x - 25, 380)
         else:
             self.canvas.moveto(self.temp_rect1, -50, 0)
-
-        # with idx 1 --> lower linear interpolated color
-        color_left = hex_to_rgb(self.colors[1][0])
-        color_right = hex_to_rgb(self.colors[1][1])
-
-        rgb1 = rel_distance_to_right*np.array(color_left) + rel_distance_to_left*np.array(color_right)
-        if self.show_intermediate_step:
-            r, g, b = rgb1
-            color = rgb_to_hex(int(r), int(g), int(b))
-            self.canvas.itemconfig(self.temp_rect2, fill=color)
-            self.canvas.moveto(self.temp_rect2, 350*rel_distance_to_left, 380)
-        else:
             self.canvas.moveto(self.temp_rect2, -50, 380)
 
-        # now calculate relatively up and relatively down
-        rel_distance_to_bottom = (self.coords[1][1][1]-y)/(self.coords[1][1][1]-self.coords[0][1][1])
-        rel_distance_to_top = (y-self.coords[0][1][1])/(self.coords[1][1][1]-self.coords[0][1][1])
-
-        r, g, b = rel_distance_to_bottom * rgb0 + rel_distance_to_top * rgb1
-
-        color = rgb_to_hex(int(r), int(g), int(b))
-        self.canvas.itemconfig(self.draggable_element, fill=color)
+        # and between both of them relatively up and down
+        r, g, b = self.grid.value_at(x, y).astype(int)
+        self.canvas.itemconfig(self.draggable_element, fill=rgb_to_hex(r, g, b))
+
+    def render_field(self):
+        # renders the interpolated colors of every canvas pixel in one vectorized pass
+        if not self.show_field.get():
+            self.canvas.itemconfig(self.field_image, state=tk.HIDDEN)
+            return
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width < 2 or height < 2:
+            return
+        image = Image.fromarray(self.grid.render(width, height))
+        # paste into the existing photo image, a new one is only needed if the canvas size changes
+        if self.field_photo is None or (self.field_photo.width(), self.field_photo.height()) != image.size:
+            self.field_photo = ImageTk.PhotoImage(image)
+            self.canvas.itemconfig(self.field_image, image=self.field_photo)
+        else:
+            self.field_photo.paste(image)
+        self.canvas.itemconfig(self.field_image, state=tk.NORMAL)
+        self.canvas.tag_lower(self.field_image)
 
     def on_press(self, event):
         self.position[0] = event.x
@@ -142,17 +159,21 @@ class UIWindow:
         color = random_color()
         self.canvas.itemconfig(self.rc[i][j], fill=color)
         self.colors[i][j] = color
+        self.grid.set_value(i, j, hex_to_rgb(color))
 
         # propagate color change to interpolation function
         self.interpolate_color( *self.position )
+        self.render_field()
 
     def on_drag(self, event):
         dx = event.x - self.position[0]
         dy = event.y - self.position[1]
 
-        if not (25 < self.position[0]+dx < 375):
+        # stay inside of the control point grid
+        x0, y0, x1, y1 = self.grid.bounds
+        if not (x0 < self.position[0]+dx < x1):
             dx = 0
-        if not (25 < self.position[1]+dy < 375):
+        if not (y0 < self.position[1]+dy < y1):
             dy = 0
         self.position[0] += dx
         self.position[1] += dy
@@ -168,17 +189,25 @@ class UIWindow:
         self.interpolate_color( *self.position )
 
     def mainloop(self):
-        while self.running:
-            self.window.update_idletasks()
-            self.window.update()
-            # react on when training thread is finished
-            #if not self.queue.empty() and self.queue.get_nowait() == 1:
-            #    self.update_results()
-            #time.sleep(0.1)
+        # Tk's own event loop: no polling, drag events are handled as they come
+        self.runtime.mainloop()
 
 
 def main():
-    app = UIWindow()
+    parser = argparse.ArgumentParser(description="Linear Interpolation Demo")
+    parser.add_argument("rows", type=int, nargs="?", default=2)
+    parser.add_argument("columns", type=int, nargs="?", default=2)
+    parser.add_argument("--nonuniform", action="store_true", help="randomly spaced control points")
+    args = parser.parse_args()
+
+    xs = ys = None
+    if args.nonuniform:
+        # random spacing, rescaled to the default area
+        xs = np.cumsum(np.random.uniform(0.3, 1.0, args.columns))
+        ys = np.cumsum(np.random.uniform(0.3, 1.0, args.rows))
+        xs = 25 + 350 * (xs - xs[0]) / (xs[-1] - xs[0])
+        ys = 25 + 350 * (ys - ys[0]) / (ys[-1] - ys[0])
+    app = UIWindow(args.rows, args.columns, xs, ys)
     app.mainloop()
 
 
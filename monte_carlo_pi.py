@@ -15,28 +15,36 @@
 #
 #  IMPORTANT NOTE:
 #  This project is just to demonstrate Monte-Carlo in a lecture and for the sake of simplicity
-#  it uses python's built-in random() number generator!!!
+#  it uses numpy's (seedable) pseudo random number generator, see montecarlo/engine.py!!!
 #
 #  Therefore, it does not make use of a "TRUE RANDOM NUMBER GENERATOR!!!"
 #  which means: for a real monte-carlo simulation you want to make sure to have "REAL RANDOM NUMBERS"
 #
+#  Without a display the simulation runs headless:
+#     python monte_carlo_pi.py --samples 100000000 [--seed 42]
+#
 #  Gnu GPL 3.0
 #
 
-import random
+import argparse
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.filedialog as filedialog
 import time
+from PIL import Image, ImageTk
+
+from controls.appruntime import AppRuntime
+from montecarlo.engine import MonteCarloPi
+from montecarlo.raster import DensityRaster
 
 
 class UIWindow:
     VERSION = "0.9"
 
-    def __init__(self):
+    def __init__(self, seed=None):
         self.window = tk.Tk()
         self.window.title("Monte Carlo PI")
-        self.running = True
+        self.runtime = AppRuntime(self.window)
 
         self.window.grid_columnconfigure(0, weight=1)
 
@@ -47,67 +55,107 @@ class UIWindow:
         self.result = tk.Label(self.window, text="Pi is approximately")
         self.result.grid(column=0, row=1, sticky='NW')
 
-        self.points = []
-        self.rectangle_count = 0
-        self.circle_count = 0
+        self.controls = tk.Frame(self.window)
+        self.controls.grid(column=0, row=2, sticky='NW')
+        self.heat = tk.BooleanVar(value=False)
+        self.heat_check = tk.Checkbutton(self.controls, text="Density heat", variable=self.heat,
+                                         command=self.render_points)
+        self.heat_check.pack(side=tk.LEFT)
+        self.clear_button = tk.Button(self.controls, text="Clear", command=self.clear)
+        self.clear_button.pack(side=tk.LEFT)
+        self.status = tk.Label(self.window, text="-")
+        self.status.grid(column=0, row=3, sticky='NW')
+        self.runtime.every(1000, lambda: self.status.config(text=self.runtime.stats.summary()))
+
+        # the simulation only keeps counts, points are accumulated in a raster shown as one image item
+        self.engine = MonteCarloPi(seed)
+        self.raster = DensityRaster(400, 400)
+        self.photo = ImageTk.PhotoImage(Image.fromarray(self.raster.render()))
+        self.image_item = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+        self.canvas.create_oval(0, 0, 400, 400, outline="black")
 
         self.clear()
 
         self.canvas.bind("<Button-1>", self.add_points)
 
+    @property
+    def rectangle_count(self):
+        return self.engine.counts.total
+
+    @property
+    def circle_count(self):
+        return self.engine.counts.inside
+
     def clear(self):
-        self.points = []
-        self.rectangle_count = 0
-        self.circle_count = 0
+        if self.runtime.busy:
+            return      # a batch is being drawn into engine and raster
+        self.engine.reset()
+        self.raster.clear()
+        self.render_points()
+        self.result.config(text="Pi is approximately")
 
     def add_points(self, event):
+        if self.runtime.busy:
+            return      # the previous batch is still being drawn
+        # one batch per click, growing with the number of points so far
         if self.rectangle_count < 30:
-            self.add_point(event)
+            self.add_batch(1)
         else:
             if self.rectangle_count < 2000:
-                for i in range(0, 100):
-                    self.add_point(event)
+                self.add_batch(100)
+            elif self.rectangle_count < 100000:
+                self.add_batch(1000)
             else:
-                for i in range(0, 1000):
-                    self.add_point(event)
-
-    def add_point(self, event):
-        # x, y = event.x, event.y
-        x = random.random()*2 - 1
-        y = random.random()*2 - 1
+                # drawing costs the same for any number of points: grow up to a million per click
+                self.add_batch(min(self.rectangle_count // 10, 1000000))
 
-        self.points.append((x, y))
+    def add_batch(self, n):
+        if n >= 100000:
+            # large batches are drawn on a worker thread, the window stays responsive meanwhile
+            self.runtime.run_in_background(self.draw_batch, n, on_done=lambda _: self.show_batch())
+        else:
+            self.draw_batch(n)
+            self.show_batch()
 
-        is_inside_circle = False
+    def draw_batch(self, n):
+        # no Tk calls in here, it may run on a worker thread
+        points, inside = self.engine.draw(n)
+        self.raster.add(points, inside)
 
-        self.rectangle_count += 1
-        if x**2+y**2 <= 1:
-            self.circle_count += 1
-            is_inside_circle = True
-        self.plot_point(200+(200*x), 200+200*y, is_inside_circle)
+    def show_batch(self):
+        self.render_points()
 
-        self.result.config(text="Pi is approx. 4 x {}/{}  = {}".format(self.circle_count,
-                                                                       self.rectangle_count,
-                                                                       4*self.circle_count/self.rectangle_count))
+        # the result once per batch
+        counts = self.engine.counts
+        low, high = counts.confidence_interval()
+        self.result.config(text="Pi is approx. 4 x {}/{}  = {:.6f} +- {:.6f} (95% CI {:.6f} .. {:.6f})".format(
+            counts.inside, counts.total, counts.estimate, counts.standard_error, low, high))
 
-    def plot_point(self, x, y, inside_circle):
-        color_text = "blue"
-        if inside_circle:
-            color_text = "red"
-        self.canvas.create_oval(x-3, y-3, x+3, y+3, fill=color_text, outline=color_text)
+    def render_points(self):
+        # one paste into the single image item per batch
+        self.photo.paste(Image.fromarray(self.raster.render(self.heat.get())))
 
     def mainloop(self):
-        while self.running:
-            self.window.update_idletasks()
-            self.window.update()
-            # react on when training thread is finished
-            #if not self.queue.empty() and self.queue.get_nowait() == 1:
-            #    self.update_results()
-            time.sleep(0.1)
+        # Tk's own event loop, background batches report back through the runtime's queue
+        self.runtime.mainloop()
 
 
 def main():
-    app = UIWindow()
+    parser = argparse.ArgumentParser(description="Monte Carlo PI")
+    parser.add_argument("--samples", type=float, default=None, help="run headless with this many samples, e.g. 1e8")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.samples is not None:
+        engine = MonteCarloPi(args.seed)
+        start = time.perf_counter()
+        counts = engine.run(int(args.samples))
+        elapsed = time.perf_counter() - start
+        print(counts.summary())
+        print(f"{counts.total} samples in {elapsed:.2f} s, {counts.total / elapsed / 1e6:.1f} M samples/s")
+        return
+
+    app = UIWindow(args.seed)
     app.mainloop()
 
 
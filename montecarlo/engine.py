@@ -0,0 +1,101 @@
+# Batch Monte Carlo engine to "estimate pi", independent of any UI
+#
+#  Points are drawn uniformly from the square [-1, 1]^2 in NumPy batches from a seedable
+#  numpy.random.Generator; only the running counts (points inside the circle / all points) are kept,
+#  so memory does not grow with the number of samples. The count of hits is binomial with
+#  p = pi / 4, which gives
+#
+#    estimate       = 4 * hits / n
+#    standard error = 4 * sqrt(p * (1 - p) / n)        (p estimated as hits / n)
+#    confidence     = estimate +- z * standard error   (z = 1.96 for 95 %)
+#
+#  Every point takes two consecutive numbers (x, y) of the generator's stream, so for a given seed
+#  the result does not depend on the batch sizes used to draw the points.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import math
+
+import numpy as np
+
+CHUNK = 1 << 20     # points per chunk of the headless run, 16 MB of coordinates
+
+
+class PiEstimate:
+    # running counts with the statistics derived from them
+    def __init__(self, inside=0, total=0):
+        self.inside = inside
+        self.total = total
+
+    def add(self, inside, total):
+        self.inside += int(inside)
+        self.total += int(total)
+
+    @property
+    def estimate(self):
+        return 4 * self.inside / self.total if self.total else math.nan
+
+    @property
+    def standard_error(self):
+        if not self.total:
+            return math.nan
+        p = self.inside / self.total
+        return 4 * math.sqrt(p * (1 - p) / self.total)
+
+    def confidence_interval(self, z=1.96):
+        estimate, error = self.estimate, self.standard_error
+        return estimate - z * error, estimate + z * error
+
+    def summary(self, z=1.96):
+        low, high = self.confidence_interval(z)
+        return (f"pi ~ 4 x {self.inside}/{self.total} = {self.estimate:.6f} +- {self.standard_error:.6f} "
+                f"(CI [{low:.6f}, {high:.6f}])")
+
+
+class MonteCarloPi:
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.counts = PiEstimate()
+        self.buffer = None      # reused chunk buffers of run()
+        self.squares = None
+
+    def reset(self, seed=None):
+        # starts over, with the initial seed unless another one is given
+        self.seed = self.seed if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        self.counts = PiEstimate()
+
+    def draw(self, n):
+        # n points as (n, 2) array of x, y in [-1, 1] and the boolean inside mask; adds them to the counts
+        points = self.rng.random((n, 2))
+        points *= 2
+        points -= 1
+        inside = points[:, 0] ** 2 + points[:, 1] ** 2 <= 1
+        self.counts.add(np.count_nonzero(inside), n)
+        return points, inside
+
+    def run(self, n, callback=None):
+        # draws n points without keeping them, in chunks with reused buffers; callback(counts) after
+        # every chunk, e.g. for progress output
+        if self.buffer is None:
+            self.buffer = np.empty((CHUNK, 2))
+            self.squares = np.empty(CHUNK)
+        while n > 0:
+            size = min(n, CHUNK)
+            points = self.buffer[:size]
+            squares = self.squares[:size]
+            self.rng.random(out=points)
+            points *= 2
+            points -= 1
+            points *= points
+            np.add(points[:, 0], points[:, 1], out=squares)
+            self.counts.add(np.count_nonzero(squares <= 1), size)
+            n -= size
+            if callback is not None:
+                callback(self.counts)
+        return self.counts
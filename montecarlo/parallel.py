@@ -0,0 +1,133 @@
+# Parallel Monte Carlo runner: independent reproducible random streams on a process pool
+#
+#  usage: python -m montecarlo.parallel [--samples 1e9] [--workers N] [--seed S] [--target-width 1e-4]
+#
+#  The run is split into rounds of one batch per stream (one stream per worker). Batch k of stream w
+#  draws from its own generator, seeded with the child SeedSequence (seed, spawn_key=(w, k)), i.e.
+#  SeedSequence(seed).spawn(workers)[w].spawn(...)[k]: the streams are statistically independent and
+#  a batch's result only depends on the seed, the worker count and its position, not on which process
+#  runs it or when. Finished batches are merged into the live estimate right away; the final result
+#  and the early stop (confidence interval narrower than the target width) only consider complete
+#  rounds in order, so they are bit-reproducible for a given seed and worker count.
+#
+#  (c) 2024 - Prof. Dr. Markus Graf
+#  Faculty of Informatics, University of Applied Sciences Heilbronn
+#
+#  Gnu GPL 3.0
+#
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from montecarlo.engine import MonteCarloPi, PiEstimate
+
+BATCH_SIZE = 1 << 22
+
+
+def count_batch(entropy, stream, index, n):
+    # runs in the worker process: hits of batch index of the given stream
+    engine = MonteCarloPi(np.random.SeedSequence(entropy, spawn_key=(stream, index)))
+    return engine.run(n).inside
+
+
+class ParallelPi:
+    def __init__(self, seed=None, workers=None, batch_size=BATCH_SIZE):
+        # without a seed fresh entropy is used, it is kept in self.seed to repeat the run
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def batches(self, samples):
+        # (stream, index, size) in round order, the last round shares the remaining samples
+        k = 0
+        while samples > 0:
+            for stream in range(self.workers):
+                size = min(self.batch_size, samples)
+                if size > 0:
+                    yield stream, k, size
+                samples -= size
+            k += 1
+
+    def round_size(self, samples, k):
+        # number of batches of round k
+        remaining = samples - k * self.workers * self.batch_size
+        return min(self.workers, -(-remaining // self.batch_size))
+
+    def run(self, samples, target_width=None, z=1.96, callback=None):
+        # returns the PiEstimate of all complete rounds up to the first one whose confidence interval is
+        # narrower than target_width (or all samples); callback(live counts) for every finished batch
+        samples = int(samples)
+        batches = self.batches(samples)
+        live = PiEstimate()
+        final = PiEstimate()
+        rounds = dict()     # round -> [finished batches, hits, samples]
+        next_round = 0
+        running = dict()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            stop = False
+            while not stop:
+                for stream, k, size in batches:
+                    running[pool.submit(count_batch, self.seed, stream, k, size)] = (k, size)
+                    if len(running) >= 2 * self.workers:
+                        break
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    k, size = running.pop(future)
+                    inside = future.result()
+                    live.add(inside, size)
+                    state = rounds.setdefault(k, [0, 0, 0])
+                    state[0] += 1
+                    state[1] += inside
+                    state[2] += size
+                    if callback is not None:
+                        callback(live)
+
+                # merge complete rounds in order
+                while next_round in rounds and rounds[next_round][0] == self.round_size(samples, next_round):
+                    _, inside, total = rounds.pop(next_round)
+                    final.add(inside, total)
+                    next_round += 1
+                    if target_width is not None and final.total and 2 * z * final.standard_error <= target_width:
+                        stop = True
+                        break
+            for future in running:
+                future.cancel()
+        return final
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate pi with independent random streams on all cores")
+    parser.add_argument("--samples", type=float, default=1e9, help="maximum number of samples")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None, help="seed (default: fresh entropy, printed)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="samples per batch")
+    parser.add_argument("--target-width", type=float, default=None, help="stop at this 95%% CI width")
+    args = parser.parse_args(argv)
+
+    runner = ParallelPi(args.seed, args.workers, args.batch)
+    print(f"seed {runner.seed}, {runner.workers} workers")
+    start = time.perf_counter()
+    last = [0.0]
+
+    def progress(counts):
+        now = time.perf_counter()
+        if now - last[0] > 0.5:
+            print(f"  {counts.summary()}, {counts.total / (now - start) / 1e6:.1f} M samples/s")
+            last[0] = now
+
+    counts = runner.run(int(args.samples), args.target_width, callback=progress)
+    elapsed = time.perf_counter() - start
+    print(counts.summary())
+    print(f"{counts.total} samples in {elapsed:.2f} s, {counts.total / elapsed / 1e6:.1f} M samples/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# Tests of imaging/series.py on small DICOM series synthesized with pydicom
+#
+#  usage: python -m pytest tests
+#
+
+import os
+
+import numpy as np
+import pydicom
+from pydicom.dataset import FileDataset, FileMetaDataset
+from pydicom.uid import CTImageStorage, ExplicitVRLittleEndian, generate_uid
+
+from imaging.series import DicomSeries
+
+SIZE = 8
+
+
+def write_slice(directory, filename, series_uid, z, instance, pixels, intercept=-1024):
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = CTImageStorage
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    path = os.path.join(directory, filename)
+    ds = FileDataset(path, {}, file_meta=meta, preamble=b"\0" * 128)
+    ds.SOPClassUID = CTImageStorage
+    ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+    ds.SeriesInstanceUID = series_uid
+    ds.Modality = "CT"
+    ds.InstanceNumber = instance
+    ds.ImagePositionPatient = [0.0, 0.0, z]
+    ds.ImageOrientationPatient = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+    ds.PixelSpacing = [0.5, 0.5]
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 16
+    ds.HighBit = 15
+    ds.PixelRepresentation = 0
+    ds.RescaleSlope = 1
+    ds.RescaleIntercept = intercept
+    ds.PixelData = pixels.astype(np.uint16).tobytes()
+    pydicom.dcmwrite(path, ds, enforce_file_format=True)
+
+
+def write_series(directory, n_slices=6):
+    # slice k (in patient order) is filled with 100 * k + its pixel index; files are written in
+    # reverse order with instance numbers that disagree with the positions
+    series_uid = generate_uid()
+    expected = []
+    for k in range(n_slices):
+        pixels = 100 * k + np.arange(SIZE * SIZE).reshape(SIZE, SIZE)
+        write_slice(directory, f"IM{n_slices - k:03d}.dcm", series_uid, z=2.5 * k, instance=n_slices - k,
+                    pixels=pixels)
+        expected.append(pixels - 1024)
+    return np.array(expected, dtype=np.int16)
+
+
+def test_slices_sorted_by_position(tmp_path):
+    expected = write_series(str(tmp_path))
+    series = DicomSeries(str(tmp_path), workers=2)
+    try:
+        positions = [info.position for info in series.slices]
+        assert positions == sorted(positions)
+        assert series.spacing[2] == 2.5
+        for index in range(len(series)):
+            assert np.array_equal(series.get_slice(index), expected[index])
+    finally:
+        series.close()
+
+
+def test_read_volume(tmp_path):
+    expected = write_series(str(tmp_path))
+    series = DicomSeries(str(tmp_path), workers=2)
+    try:
+        series.get_slice(2)     # one slice already in the slice cache
+        volume = series.read_volume()
+        assert volume.dtype == np.int16 and volume.flags.c_contiguous
+        assert np.array_equal(volume, expected)
+    finally:
+        series.close()
+
+
+def test_values_outside_int16_are_clipped(tmp_path):
+    pixels = np.array([[0, 1024, 40000, 65535]] * 4)
+    write_slice(str(tmp_path), "IM001.dcm", generate_uid(), z=0.0, instance=1, pixels=pixels)
+    series = DicomSeries(str(tmp_path))
+    try:
+        assert series.get_slice(0)[0].tolist() == [-1024, 0, 32767, 32767]
+    finally:
+        series.close()